@@ -14,7 +14,39 @@ DEVELOPER = os.getenv("DEVELOPER_USERNAME")
 
 home_dir = os.path.expanduser("~")
 log_file = os.path.join(home_dir, "logs", "IPSA.log")
-data_file = os.path.join(home_dir, "IPSA", "IPSA.db")
+data_dir = os.path.join(home_dir, "IPSA")
+data_file = os.path.join(data_dir, "IPSA.db")
+history_dir = os.path.join(data_dir, "history")
+fundamentals_file = os.path.join(data_dir, "fundamentals.db")
+articles_file = os.path.join(data_dir, "articles.db")
+http_cache_file = os.path.join(data_dir, "http_cache.db")
+
+QUOTE_CACHE_TTL = float(os.getenv("QUOTE_CACHE_TTL", "60"))
+QUOTE_CACHE_SIZE = int(os.getenv("QUOTE_CACHE_SIZE", "1024"))
+NAME_CACHE_TTL = float(os.getenv("NAME_CACHE_TTL", "86400"))
+QUOTE_BATCH_SIZE = int(os.getenv("QUOTE_BATCH_SIZE", "200"))
+PRICE_CHECK_INTERVAL = float(os.getenv("PRICE_CHECK_INTERVAL", "60"))
+NEWS_POLL_INTERVAL = float(os.getenv("NEWS_POLL_INTERVAL", "120"))
+NEWS_MAX_AGE = float(os.getenv("NEWS_MAX_AGE", "600"))
+NEWS_FETCH_WORKERS = int(os.getenv("NEWS_FETCH_WORKERS", "16"))
+NEWS_FETCH_PER_HOST = int(os.getenv("NEWS_FETCH_PER_HOST", "8"))
+NEWS_FETCH_TIMEOUT = float(os.getenv("NEWS_FETCH_TIMEOUT", "15"))
+NEWS_CRAWL_MAX_PAGES = int(os.getenv("NEWS_CRAWL_MAX_PAGES", "50"))
+YAHOO_RPS = float(os.getenv("YAHOO_RPS", "2"))
+YAHOO_BURST = int(os.getenv("YAHOO_BURST", "5"))
+YAHOO_MIN_RPS = float(os.getenv("YAHOO_MIN_RPS", "0.2"))
+YAHOO_MAX_RETRIES = int(os.getenv("YAHOO_MAX_RETRIES", "3"))
+MARKET_DATA_WORKERS = int(os.getenv("MARKET_DATA_WORKERS", "8"))
+MARKET_DATA_TIMEOUT = float(os.getenv("MARKET_DATA_TIMEOUT", "30"))
+COMPUTE_TIMEOUT = float(os.getenv("COMPUTE_TIMEOUT", "300"))
+MODEL_WARMUP = os.getenv("MODEL_WARMUP", "1") == "1"
+STATS_LOG_INTERVAL = float(os.getenv("STATS_LOG_INTERVAL", "600"))
+
+MARKET_DATA_PROVIDER = os.getenv("MARKET_DATA_PROVIDER", "yahoo")
+MARKET_DATA_RECORD_DIR = os.getenv("MARKET_DATA_RECORD_DIR")
+REPLAY_DIR = os.getenv("REPLAY_DIR", os.path.join(data_dir, "replay"))
+REPLAY_LATENCY = float(os.getenv("REPLAY_LATENCY", "0"))
+REPLAY_ERROR_RATE = float(os.getenv("REPLAY_ERROR_RATE", "0"))
 
 if not all([API_ID, API_HASH, BOT_TOKEN]):
     raise ValueError(
@@ -1,10 +1,12 @@
 import pandas as pd
-import yfinance as yf
 
 from pathlib import Path
 import joblib
 import os
 
+from market.fundamentals import fundamentals_cache
+from market.history_store import history_store
+
 class AdvicePredictor:
     def _calculate_score(self, info):
         score_rules = [
@@ -38,8 +40,7 @@ class AdvicePredictor:
 
     def analyze_fundamentals(self, ticker):
         try:
-            stock = yf.Ticker(ticker)
-            info = stock.info
+            info = fundamentals_cache.get_info(ticker)
 
             audit_risk = info.get("auditRisk", 0)
             board_risk = info.get("boardRisk", 0)
@@ -63,7 +64,7 @@ class AdvicePredictor:
 
     def analyze(self, ticker, forecast_growth=0):
         try:
-            data = yf.download(ticker, period="1y")
+            data = history_store.get_history(ticker, period="1y")
             if data.empty:
                 return f"Data not found for {ticker}"
 
@@ -139,8 +140,7 @@ class ReportTable:
         self.report_path = f"client_data/{ticker}_report.xlsx"
     
     def download_data(self, ticker):
-        ticker = yf.Ticker(ticker)
-        ticker_info = ticker.info
+        ticker_info = fundamentals_cache.get_info(ticker, group="fundamentals")
         return ticker_info
     
     def save_report(self, data):
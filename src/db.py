@@ -1,15 +1,18 @@
 import asyncio
 import os
 import sqlite3
-import time
 from contextlib import contextmanager
 from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
+import pandas as pd
 import requests
-import yfinance as yf
 from matplotlib.backend_bases import cursors
 
-from config import DEVELOPER, home_dir, logger
+from config import DEVELOPER, QUOTE_BATCH_SIZE, home_dir, logger
+from market import yahoo
+from market.fundamentals import fundamentals_cache
+from market.quote_cache import name_cache, quote_cache
 
 
 class DatabaseManager:
@@ -24,6 +27,9 @@ class DatabaseManager:
             "host": os.getenv("POSTGRES_HOST"),
             "port": os.getenv("POSTGRES_PORT", "999"),
         }
+        # Called with (user_id, stock_name, held) after holdings change;
+        # stock_name is None when all of a user's holdings were removed
+        self.holding_listeners = []
         self._init_database()
 
     def _init_db_path(self) -> str:
@@ -121,53 +127,110 @@ class DatabaseManager:
 
     @staticmethod
     def get_stock_info(ticker: str) -> Tuple[str, float]:
-        max_retries = 3
-        retry_delay = 5
+        name = name_cache.get(ticker)
+        price = quote_cache.get(ticker)
+        if name is not None and price is not None:
+            return name, price
+
+        # Concurrent misses share one upstream request through yahoo.get_info
+        result = DatabaseManager._download_stock_info(ticker)
+        if result[1] != "Error":
+            name_cache.set(ticker, result[0])
+            quote_cache.set(ticker, result[1])
+        return result
+
+    @staticmethod
+    def _download_quotes(tickers: List[str]) -> pd.Series:
+        data = yahoo.download(
+            tickers,
+            period="1d",
+            interval="1m",
+            group_by="column",
+            progress=False,
+        )
+        if data is None or data.empty:
+            return pd.Series(dtype="float64")
+
+        close = data["Close"]
+        if isinstance(close, pd.Series):
+            close = close.to_frame(tickers[0])
+        return close.ffill().iloc[-1].astype("float64")
+
+    def get_quotes(self, tickers, chunk_size: int = QUOTE_BATCH_SIZE) -> pd.Series:
+        """Last prices for many tickers via batched yfinance downloads.
+
+        Returns a float Series indexed by upper-cased ticker, NaN where no
+        price could be fetched.
+        """
+        symbols = list(dict.fromkeys(t.strip().upper() for t in tickers))
+        prices = pd.Series(np.nan, index=symbols, dtype="float64")
+
+        missing = []
+        for symbol in symbols:
+            cached = quote_cache.get(symbol)
+            if cached is None:
+                missing.append(symbol)
+            else:
+                prices[symbol] = cached
 
-        for attempt in range(max_retries):
+        for start in range(0, len(missing), chunk_size):
+            chunk = missing[start : start + chunk_size]
             try:
-                stock = yf.Ticker(ticker)
+                last = self._download_quotes(chunk).reindex(chunk)
+            except Exception as e:
+                logger.warning(f"Batch quote download failed for {chunk}: {e}")
+                continue
+
+            prices.update(last)
+            for symbol, price in last.dropna().items():
+                quote_cache.set(symbol, float(price))
 
-                if stock is None:
-                    logger.warning(f"Failed to create Ticker object for {ticker}")
-                    return ticker, "Error"
+        logger.debug(
+            f"Quotes: {len(symbols)} tickers, {len(missing)} downloaded, "
+            f"{int(prices.isna().sum())} unavailable"
+        )
+        return prices
 
+    def get_stock_names(self, tickers) -> Dict[str, str]:
+        names = {}
+        for ticker in tickers:
+            name = name_cache.get(ticker)
+            if name is None:
                 try:
-                    stock_info = stock.info
-                    if stock_info is None or not isinstance(stock_info, dict):
-                        logger.warning(
-                            f"Invalid stock info received for {ticker}: {stock_info}"
-                        )
-                        return ticker, "Error"
-
-                    name = stock_info.get("longName")
-                    price = stock_info.get("currentPrice")
-
-                    if name is None and price is None:
-                        logger.warning(f"No price/name data available for {ticker}")
-                        return ticker, "Error"
-
-                    return (name or "Name not found", price or 0.0)
-
-                except AttributeError as ae:
-                    logger.warning(f"AttributeError for {ticker}: {ae}")
-                    return ticker, "Error"
-
-            except requests.exceptions.HTTPError as e:
-                if "404" in str(e):
-                    logger.warning(f"Ticker {ticker} not found (404 error)")
-                    return ticker, "Error"
+                    info = fundamentals_cache.get_info(ticker, group="profile")
+                    name = info.get("longName") or "Name not found"
+                    name_cache.set(ticker, name)
+                except Exception as e:
+                    logger.warning(f"Error fetching name for {ticker}: {e}")
+                    name = ticker
+            names[ticker] = name
+        return names
+
+    @staticmethod
+    def _download_stock_info(ticker: str) -> Tuple[str, float]:
+        try:
+            stock_info = fundamentals_cache.get_info(ticker, group="quote")
+            if stock_info is None or not isinstance(stock_info, dict):
+                logger.warning(f"Invalid stock info received for {ticker}: {stock_info}")
+                return ticker, "Error"
+
+            name = stock_info.get("longName")
+            price = stock_info.get("currentPrice")
+
+            if name is None and price is None:
+                logger.warning(f"No price/name data available for {ticker}")
+                return ticker, "Error"
+
+            return (name or "Name not found", price or 0.0)
+
+        except requests.exceptions.HTTPError as e:
+            if "404" in str(e):
+                logger.warning(f"Ticker {ticker} not found (404 error)")
+            else:
                 logger.warning(f"HTTP error for {ticker}: {str(e)}")
 
-            except Exception as e:
-                logger.warning(
-                    f"Attempt {attempt + 1}/{max_retries} failed for {ticker}: {str(e)}"
-                )
-                if attempt < max_retries - 1:
-                    time.sleep(retry_delay)
-                    retry_delay *= 2
-                else:
-                    return ticker, "Error"
+        except Exception as e:
+            logger.warning(f"Failed to get stock info for {ticker}: {str(e)}")
 
         return ticker, "Error"
 
@@ -210,21 +273,21 @@ class DatabaseManager:
             "SELECT stock_name FROM stocks WHERE user_id = %s", (user_id,), fetch=True
         )
 
-        result = {}
-        for (stock_name,) in stocks:
-            _, price = self.get_stock_info(stock_name)
-            result[stock_name] = float(price) if price != "Error" else 0.0
+        names = [stock_name for (stock_name,) in stocks]
+        prices = self.get_quotes(names)
 
-        return result
+        return {
+            stock_name: float(np.nan_to_num(prices[stock_name.strip().upper()]))
+            for stock_name in names
+        }
 
     def _is_crypto(self, ticker):
         return ticker.upper().endswith("-USD")
 
     def _fetch_stock_info_and_recommendations(self, ticker):
         try:
-            stock = yf.Ticker(ticker)
-            stock_info = stock.info
-            recommendations = stock.recommendations
+            stock_info = fundamentals_cache.get_info(ticker)
+            recommendations = yahoo.get_recommendations(ticker)
             return stock_info, recommendations
         except Exception as e:
             logger.warning(f"Error fetching info for {ticker}: {e}")
@@ -293,8 +356,7 @@ class DatabaseManager:
         return self._format_stock_info_dict(stock_info, recommendations)
 
     def get_promo_by_code(self, ticker):
-        stock = yf.Ticker(ticker)
-        return stock.info["longName"]
+        return yahoo.get_info(ticker)["longName"]
 
     def create_users_table(self, connection):
         try:
@@ -504,6 +566,7 @@ class DatabaseManager:
         try:
             self.execute_query("DELETE FROM stocks WHERE user_id = %s", (user_id,))
             self.execute_query("DELETE FROM users WHERE user_id = %s", (user_id,))
+            self._notify_holding(user_id, None, False)
 
             logger.warning(f"User with user_id {user_id} deleted successfully")
         except Exception as e:
@@ -605,22 +668,40 @@ class DatabaseManager:
             "SELECT stock_name FROM stocks WHERE user_id=%s", (user_id,), fetch=True
         )
 
+        names = [stock_name for (stock_name,) in rows]
+        prices = self.get_quotes(names)
+
         stock_prices = {}
-        for (stock_name,) in rows:
-            try:
-                _, price = self.get_stock_info(stock_name)
-                stock_prices[stock_name] = (
-                    float(price)
-                    if price != "Error" and not isinstance(price, str)
-                    else 0
-                )
-                logger.debug(f"{user_id}: {stock_name} - {price}")
-            except Exception as e:
-                logger.error(f"Error getting stock price for {stock_name}: {e}")
-                stock_prices[stock_name] = 0
+        for stock_name in names:
+            price = prices[stock_name.strip().upper()]
+            stock_prices[stock_name] = float(price) if not np.isnan(price) else 0
+            logger.debug(f"{user_id}: {stock_name} - {price}")
 
         return stock_prices
 
+    def get_holdings(self, user_ids):
+        """Получение (user_id, stock_name) для списка пользователей"""
+        if not user_ids:
+            return []
+        return self.execute_query(
+            "SELECT user_id, stock_name FROM stocks WHERE user_id = ANY(%s)",
+            (list(user_ids),),
+            fetch=True,
+        )
+
+    def get_all_holdings(self):
+        """(user_id, stock_name) of every holding"""
+        return self.execute_query(
+            "SELECT user_id, stock_name FROM stocks", fetch=True
+        ) or []
+
+    def _notify_holding(self, user_id, stock_name, held):
+        for listener in self.holding_listeners:
+            try:
+                listener(user_id, stock_name, held)
+            except Exception as e:
+                logger.error(f"Error in holdings listener: {e}")
+
     def get_stocks_list(self, user_id):
         with self.get_connection() as conn:
             try:
@@ -638,16 +719,22 @@ class DatabaseManager:
     def process_stocks(self, user_id):
         stocks_data = self.get_stocks_list(user_id)
 
+        tickers = [ticker for ticker, _ in stocks_data]
+        prices = self.get_quotes(tickers)
+        names = self.get_stock_names(tickers)
+
         stocks_info_list = []
 
         for ticker, quantity in stocks_data:
-            stock_name, stock_price = self.get_stock_info(ticker)
+            stock_price = prices[ticker.strip().upper()]
+            if np.isnan(stock_price):
+                stock_price = "Error"
 
             stocks_info_list.append(
                 {
                     "ticker": ticker,
                     "quantity": quantity,
-                    "name": stock_name,
+                    "name": names[ticker],
                     "price": stock_price,
                 }
             )
@@ -678,12 +765,17 @@ class DatabaseManager:
                     response_message += "You don't have any stock."
                     return response_message
 
+                tickers = [row[0] for row in rows]
+                prices = self.get_quotes(tickers)
+                names = self.get_stock_names(tickers)
+
                 for index, row in enumerate(rows):
                     stock_name = row[0]
                     quantity = row[1]
-                    company_name, stock_price = self.get_stock_info(stock_name)
+                    company_name = names[stock_name]
+                    stock_price = prices[stock_name.strip().upper()]
 
-                    if stock_price == "Error" or isinstance(stock_price, str):
+                    if np.isnan(stock_price):
                         total_value = 0
                         price_display = "N/A"
 
@@ -727,6 +819,7 @@ class DatabaseManager:
                     (user_id, stock_name, quantity),
                 )
                 conn.commit()
+                self._notify_holding(user_id, stock_name, True)
                 return True
             except Exception as e:
                 logger.error(f"Error adding stock: {e}")
@@ -743,7 +836,10 @@ class DatabaseManager:
                     """,
                     (user_id, stock_name),
                 )
+                removed = cursor.rowcount
                 conn.commit()
+                if removed:
+                    self._notify_holding(user_id, stock_name, False)
                 return True
             except Exception as e:
                 logger.error(f"Error removing stock: {e}")
@@ -768,8 +864,11 @@ class DatabaseManager:
                     """,
                     (user_id, stock_name),
                 )
+                sold_out = cursor.rowcount > 0
 
                 conn.commit()
+                if sold_out:
+                    self._notify_holding(user_id, stock_name, False)
                 return True
             except Exception as e:
                 logger.error(f"Error updating stock quantity: {e}")
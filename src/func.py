@@ -1,4 +1,5 @@
 import asyncio
+import math
 import os
 import re
 import threading
@@ -9,18 +10,19 @@ import matplotlib.pyplot as plt
 import psutil
 import pytz
 import requests
-import yfinance as yf
 from pyrogram import enums
 
-from config import app, logger
+from config import PRICE_CHECK_INTERVAL, STATS_LOG_INTERVAL, app, logger
 from db import db
 from kb_builder.admin_panel import admin_kb
 from kb_builder.user_panel import main_kb
+from market import async_client
 from plt_gen import create_plt_price
 from resources.messages import WELCOME_MESSAGE, register_message
 
-user_price_thread = {}
-user_parse_thread = {}
+price_subscribers = set()
+price_baselines = {}
+price_scheduler_task = None
 
 
 def is_string(value):
@@ -93,9 +95,10 @@ async def _send_price_update(user_id, stock_name, old_price, new_price):
     )
 
 
-async def _process_single_stock(user_id, stock_name, old_price_str):
+async def _process_single_stock(user_id, stock_name, old_price_str, current_price=None):
     try:
-        _, current_price = db.get_stock_info(stock_name)
+        if current_price is None:
+            _, current_price = db.get_stock_info(stock_name)
         if current_price == "Error" or isinstance(current_price, str):
             logger.error(f"Error getting stock price for: {stock_name} {current_price}")
             return None
@@ -113,17 +116,41 @@ async def _process_single_stock(user_id, stock_name, old_price_str):
         return old_price_str
 
 
-async def check_stock_prices(user_id):
-    retry_delay = 60
+async def _fetch_prices(tickers):
+    quotes = await async_client.get_quotes(tickers)
+    prices = {}
+    for ticker in tickers:
+        price = quotes[ticker.strip().upper()]
+        prices[ticker] = "Error" if math.isnan(price) else float(price)
+    return prices
+
+
+async def check_stock_prices():
+    """Fetch every subscribed ticker once per tick and fan changes out to holders."""
+    holdings = await asyncio.to_thread(db.get_holdings, list(price_subscribers))
+    tickers = sorted({stock_name for _, stock_name in holdings})
+    prices = await _fetch_prices(tickers)
+    logger.debug(f"Price tick: {len(tickers)} tickers for {len(holdings)} holdings")
+
+    baselines = {}
+    for user_id, stock_name in holdings:
+        key = (user_id, stock_name)
+        old_price = price_baselines.get(key) or 0
+        new_price = await _process_single_stock(
+            user_id, stock_name, old_price, prices.get(stock_name)
+        )
+        baselines[key] = new_price if new_price is not None else old_price
+
+    price_baselines.clear()
+    price_baselines.update(baselines)
+
+
+async def run_price_scheduler():
+    retry_delay = PRICE_CHECK_INTERVAL
     while True:
         try:
-            stock_prices = db.get_stocks(user_id)
-            logger.debug(f"Old stock prices: {stock_prices}")
-            for stock_name in list(stock_prices.keys()):
-                stock_prices[stock_name] = await _process_single_stock(
-                    user_id, stock_name, stock_prices[stock_name]
-                )
-            retry_delay = 60
+            await check_stock_prices()
+            retry_delay = PRICE_CHECK_INTERVAL
         except Exception as e:
             logger.error(f"Error in check_stock_prices: {e}")
             retry_delay = min(retry_delay * 2, 3600)
@@ -140,67 +167,35 @@ def start_monitoring_thread():
         logger.error(f"Error in start_monitoring_thread: {e}")
 
 
-def create_price_loop(user_id: str):
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    loop.run_until_complete(check_stock_prices(user_id))
-    loop.close()
-
-
-def create_article_loop(user_id: str):
-    from parsing import run_check_new_articles
-
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    loop.run_until_complete(run_check_new_articles(user_id))
-    loop.close()
+def start_price_scheduler():
+    global price_scheduler_task
+    if price_scheduler_task is None or price_scheduler_task.done():
+        price_scheduler_task = asyncio.get_running_loop().create_task(
+            run_price_scheduler()
+        )
+        logger.info("Started price scheduler")
 
 
-def start_price_monitor_thread(user_id: str):
+def subscribe_price_updates(user_id: str):
     try:
-        if user_id in user_price_thread:
-            logger.info(
-                f"Price thread already running for user ID: {user_id}. Skipped..."
-            )
+        if user_id in price_subscribers:
+            logger.info(f"User ID {user_id} already subscribed to prices. Skipped...")
         else:
-            price_thread = threading.Thread(
-                target=create_price_loop,
-                args=(user_id,),
-                daemon=True,
-                name=f"PriceThread-{user_id}",
-            )
-            price_thread.daemon = True
-            price_thread.start()
-
-            user_price_thread[user_id] = price_thread
-
-            logger.info(
-                f"Started price thread for checking new articles for user ID: {user_id}"
-            )
+            price_subscribers.add(user_id)
+            logger.info(f"Subscribed user ID {user_id} to price updates")
+        start_price_scheduler()
     except Exception as e:
-        logger.error(f"Error in start_parsing_thread: {e}")
+        logger.error(f"Error in subscribe_price_updates: {e}")
 
 
-def start_parsing_thread(user_id: str):
-    try:
-        if user_id in user_parse_thread:
-            logger.info(f"Thread already running for user ID: {user_id}. Skipped...")
-        else:
-            thread = threading.Thread(
-                target=create_article_loop,
-                args=(user_id,),
-                daemon=True,
-                name=f"ParsingThread-{user_id}",
-            )
-            thread.start()
+def subscribe_news_updates(user_id: str):
+    from news.service import news_service
 
-            user_parse_thread[user_id] = thread
-
-            logger.info(
-                f"Started thread for checking new articles for user ID: {user_id}"
-            )
+    try:
+        news_service.subscribe(user_id)
+        logger.info(f"Subscribed user ID {user_id} to news updates")
     except Exception as e:
-        logger.error(f"Error in start_parsing_thread: {e}")
+        logger.error(f"Error in subscribe_news_updates: {e}")
 
 
 async def notify_user(user_id, message):
@@ -261,13 +256,17 @@ def parse_time_period(period_string):
         return None
 
 
-def is_within_period(date_string, period_string, user_id):
-    """Check if the given date is within the specified period from now."""
+def is_within_period(date_string, period_string, user_id, timezone=None):
+    """Check if the given date is within the specified period from now.
+
+    Pass the user's `timezone` when checking many dates to skip the DB lookup.
+    """
     try:
         input_date = datetime.strptime(date_string, "%Y-%m-%d %H:%M:%S")
         current_time = datetime.now()
 
-        timezone = db.get_city_from_db(user_id)
+        if timezone is None:
+            timezone = db.get_city_from_db(user_id)
 
         if isinstance(timezone, tuple):
             timezone = timezone[0]
@@ -296,9 +295,52 @@ def is_within_period(date_string, period_string, user_id):
         return False
 
 
+def period_cutoff(period_string, user_id, timezone=None):
+    """Oldest UTC datetime that is_within_period still accepts, or None."""
+    try:
+        period = parse_time_period(period_string)
+        if period is None:
+            return None
+
+        if timezone is None:
+            timezone = db.get_city_from_db(user_id)
+
+        if isinstance(timezone, tuple):
+            timezone = timezone[0]
+
+        now = convert_to_utc(timezone, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        return datetime.strptime(now, "%Y-%m-%d %H:%M:%S") - period
+    except Exception as e:
+        logger.error(f"Error in period_cutoff: {e}")
+        return None
+
+
+def log_pipeline_stats():
+    """Counters of the caches, rate limiter, news pipeline and models."""
+    # Imported here: these modules import func themselves
+    from market import yahoo
+    from market.fundamentals import fundamentals_cache
+    from market.quote_cache import name_cache, quote_cache
+    from model.language import language_router
+    from model.sentiment_cache import sentiment_cache
+    from model.warmup import models_ready
+    from news.article_store import article_store
+    from news.service import news_service
+
+    logger.info(f"Quote cache: {quote_cache.stats()}, names: {name_cache.stats()}")
+    logger.info(f"Fundamentals cache: {fundamentals_cache.stats()}")
+    logger.info(f"Yahoo: {yahoo.stats()}")
+    logger.info(f"News service: {news_service.stats()}")
+    logger.info(f"Article store: {article_store.stats()}")
+    logger.info(f"Languages: {language_router.stats()}")
+    logger.info(f"Sentiment cache: {sentiment_cache.stats()}")
+    logger.info(f"Models ready: {models_ready()}")
+
+
 def log_resource_usage():
     """RESOURCE USAGE."""
     process = psutil.Process(os.getpid())
+    last_stats = time.monotonic()
 
     while True:
         cpu_usage = process.cpu_percent(interval=1)
@@ -307,6 +349,13 @@ def log_resource_usage():
         logger.debug(f"{process}")
         logger.debug(f"CPU Usage: {cpu_usage}% - Memory Usage: {memory_info}%")
 
+        if time.monotonic() - last_stats >= STATS_LOG_INTERVAL:
+            last_stats = time.monotonic()
+            try:
+                log_pipeline_stats()
+            except Exception as e:
+                logger.error(f"Error logging pipeline stats: {e}")
+
         time.sleep(60)
 
 
@@ -334,8 +383,8 @@ async def register_user(user_id, username, callback_query):
                 )
             logger.info(f"User {user_id} - {username} registered")
 
-            start_parsing_thread(user_id)
-            start_price_monitor_thread(user_id)
+            subscribe_news_updates(user_id)
+            subscribe_price_updates(user_id)
 
         else:
             await callback_query.message.edit_text(
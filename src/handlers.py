@@ -8,7 +8,16 @@ from threading import Thread
 from pyrogram import Client, enums, filters
 from pyrogram.types import InputMediaPhoto, Message
 
-from config import API_HASH, API_ID, BOT_TOKEN, app, data_file, log_file, logger
+from config import (
+    API_HASH,
+    API_ID,
+    BOT_TOKEN,
+    COMPUTE_TIMEOUT,
+    app,
+    data_file,
+    log_file,
+    logger,
+)
 from create_report import AdvicePredictor, ReportTable
 from db import db
 from func import (
@@ -19,8 +28,8 @@ from func import (
     register_user,
     send_images,
     start_monitoring_thread,
-    start_parsing_thread,
-    start_price_monitor_thread,
+    subscribe_news_updates,
+    subscribe_price_updates,
 )
 from kb_builder.admin_panel import admin_kb, admin_panel, users_control
 from kb_builder.user_panel import (
@@ -32,8 +41,9 @@ from kb_builder.user_panel import (
     settings_kb,
     stocks_management_kb,
 )
-from model.price_core import StockPredictor
-from parsing import NewsParser, run_check_new_articles
+from market import async_client
+from model import price_core
+from parsing import NewsParser
 from resources.messages import (
     ASSETS_MESSAGE,
     WELCOME_MESSAGE,
@@ -100,8 +110,8 @@ async def start(client, message):
                             f"Error sending user welcome photo: {e}", exc_info=True
                         )
 
-                start_parsing_thread(user_id)
-                start_price_monitor_thread(user_id)
+                subscribe_news_updates(user_id)
+                subscribe_price_updates(user_id)
             else:
                 photo_path = img_path
                 logger.info(f"New User: {user_id} - {username} - banned")
@@ -286,7 +296,7 @@ async def answer(client, callback_query):
                 )
             else:
                 user_states[user_id] = "price"
-                users_stocks = db.get_users_stocks(user_id)
+                users_stocks = await async_client.get_users_stocks(user_id)
                 message = (
                     f"You have {tokens} free tokens\n\n{users_stocks}{check_price}"
                 )
@@ -370,7 +380,7 @@ async def answer(client, callback_query):
                 parse_mode=enums.ParseMode.MARKDOWN,
             )
 
-            users_stocks = db.get_users_stocks(user_id)
+            users_stocks = await async_client.get_users_stocks(user_id)
             message = ASSETS_MESSAGE + "\n\n__" + users_stocks + "__"
 
             await callback_query.message.edit_text(
@@ -382,7 +392,7 @@ async def answer(client, callback_query):
         if data == "add_stocks":
             logger.info(f"add_stocks: {user_id} - {username}")
             user_states[user_id] = "adding"
-            stocks_message = db.get_users_stocks(user_id)
+            stocks_message = await async_client.get_users_stocks(user_id)
             message = add_asset_request + stocks_message
             await callback_query.message.edit_text(
                 message,
@@ -393,7 +403,7 @@ async def answer(client, callback_query):
         if data == "remove_stocks":
             logger.info(f"remove_stocks: {user_id} - {username}")
             user_states[user_id] = "removing"
-            stocks_message = db.get_users_stocks(user_id)
+            stocks_message = await async_client.get_users_stocks(user_id)
             message = remove_asset_request + stocks_message
             await callback_query.message.edit_text(
                 message,
@@ -406,7 +416,7 @@ async def answer(client, callback_query):
 
             user_states[user_id] = "none"
 
-            users_stocks = db.get_users_stocks(user_id)
+            users_stocks = await async_client.get_users_stocks(user_id)
             message = ASSETS_MESSAGE + "\n\n__" + users_stocks + "__"
 
             await callback_query.message.edit_text(
@@ -538,9 +548,27 @@ async def handle_input(client, message):
         data = message.text
 
         news_parser = NewsParser()
-        results = news_parser.start_parsing(data, user_id)
-        for result in results:
-            await notify_user(user_id, result)
+        try:
+            items, timezone = await async_client.run(
+                news_parser.collect_news, data, user_id, timeout=COMPUTE_TIMEOUT
+            )
+            if items:
+                await async_client.run_compute(news_parser.classify_articles, items)
+        except asyncio.TimeoutError:
+            logger.error(f"Timed out while collecting news for {user_id}")
+            await app.send_photo(
+                photo=img_path,
+                chat_id=user_id,
+                caption="⌛ News are taking too long to load. Try again later",
+                reply_markup=back_kb,
+                parse_mode=enums.ParseMode.MARKDOWN,
+            )
+            user_states[user_id] = None
+            return
+        for item in items:
+            await notify_user(
+                user_id, news_parser.render_article(item, timezone, user_id)
+            )
 
         photo_path = img_path
         await app.send_photo(
@@ -568,23 +596,40 @@ async def handle_input(client, message):
 
     elif state == "price":
         await app.delete_messages(chat_id=user_id, message_ids=price_sent_message.id)
-        wait_message = await app.send_message(user_id, "⏳ Thinking...")
+        wait_message = await app.send_message(
+            user_id,
+            "⏳ Thinking..." if price_core.is_ready() else "⏳ Loading model...",
+        )
         data = message.text
 
-        stock_name, _ = db.get_stock_info(data)
-        info = db.get_more_info(data)
+        try:
+            stock_name, _ = await async_client.get_stock_info(data)
+            info = await async_client.get_more_info(data)
 
-        predictor = StockPredictor()
-        predict_message, price_change = predictor.analyze(data)
+            predictor = await async_client.run_compute(price_core.get_predictor)
+            predict_message, price_change = await async_client.run_compute(
+                predictor.analyze, data
+            )
 
-        advice_predictor = AdvicePredictor()
-        advice_message = advice_predictor.analyze(data, price_change)
+            advice_predictor = AdvicePredictor()
+            advice_message = await async_client.run(
+                advice_predictor.analyze, data, price_change
+            )
 
-        report_table = ReportTable(data)
-        report_data = report_table.download_data(data)
-        report_path = report_table.save_report(report_data)
+            report_table = ReportTable(data)
+            report_data = await async_client.run(report_table.download_data, data)
+            report_path = await async_client.run(report_table.save_report, report_data)
 
-        predict_path = predictor.predict_plt(data, user_id)
+            predict_path = await async_client.run_compute(
+                predictor.predict_plt, data, user_id
+            )
+        except asyncio.TimeoutError:
+            logger.error(f"Timed out while analyzing {data} for {user_id}")
+            await wait_message.edit_text(
+                "⌛ Market data is taking too long to load. Try again later",
+            )
+            user_states[user_id] = None
+            return
 
         db.update_tokens(user_id, "-1")
         updated_tokens = db.get_network_tokens(user_id)
@@ -1,7 +1,10 @@
-from config import API_ID, API_HASH, BOT_TOKEN, data_file, log_file, logger
+from config import API_ID, API_HASH, BOT_TOKEN, MODEL_WARMUP, data_file, log_file, logger
 from handlers import app
 from db import db
 from func import start_monitoring_thread
+from market.async_client import compute_executor
+from model.warmup import warm_up_models
+from news.entity_index import entity_index
 
 if __name__ == "__main__":
     start_monitoring_thread()
@@ -9,4 +12,11 @@ if __name__ == "__main__":
     # Инициализация базы данных
     db._init_database()  # Создаст все необходимые таблицы
 
+    # Holdings and company names for news mentions, off the poll path
+    entity_index.warm_up()
+
+    if MODEL_WARMUP:
+        # Runs on the compute worker, so it never races a real inference
+        compute_executor.submit(warm_up_models)
+
     app.run()
@@ -0,0 +1,55 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from config import COMPUTE_TIMEOUT, MARKET_DATA_TIMEOUT, MARKET_DATA_WORKERS
+from db import db
+from market.history_store import history_store
+
+# Network-bound work (yfinance, scraping) runs on a bounded pool; model
+# inference and matplotlib rendering share a single worker because neither
+# Keras nor pyplot is safe to drive from several threads at once.
+io_executor = ThreadPoolExecutor(
+    max_workers=MARKET_DATA_WORKERS, thread_name_prefix="MarketData"
+)
+compute_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="Compute")
+
+
+async def _run_in(executor, fn, args, kwargs, timeout):
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(executor, functools.partial(fn, *args, **kwargs))
+    # On timeout the worker thread finishes in the background, only the
+    # awaiting handler is released
+    return await asyncio.wait_for(future, timeout)
+
+
+async def run(fn, *args, timeout=MARKET_DATA_TIMEOUT, **kwargs):
+    """Await a blocking network call on the market-data pool."""
+    return await _run_in(io_executor, fn, args, kwargs, timeout)
+
+
+async def run_compute(fn, *args, timeout=COMPUTE_TIMEOUT, **kwargs):
+    """Await model inference or plot rendering on the compute worker."""
+    return await _run_in(compute_executor, fn, args, kwargs, timeout)
+
+
+async def get_stock_info(ticker, timeout=MARKET_DATA_TIMEOUT):
+    return await run(db.get_stock_info, ticker, timeout=timeout)
+
+
+async def get_more_info(ticker, timeout=MARKET_DATA_TIMEOUT):
+    return await run(db.get_more_info, ticker, timeout=timeout)
+
+
+async def get_quotes(tickers, timeout=MARKET_DATA_TIMEOUT):
+    return await run(db.get_quotes, tickers, timeout=timeout)
+
+
+async def get_history(ticker, period="1y", interval="1d", timeout=MARKET_DATA_TIMEOUT):
+    return await run(
+        history_store.get_history, ticker, period, interval, timeout=timeout
+    )
+
+
+async def get_users_stocks(user_id, timeout=MARKET_DATA_TIMEOUT):
+    return await run(db.get_users_stocks, user_id, timeout=timeout)
@@ -0,0 +1,122 @@
+import json
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+import pytz
+
+from config import QUOTE_CACHE_TTL, fundamentals_file, logger
+from market import yahoo
+from sqlite_store import SQLiteStore
+
+MARKET_TZ = pytz.timezone("America/New_York")
+MARKET_OPEN = (9, 30)
+
+# Freshness rules per group of Ticker.info fields. "daily" groups are also
+# invalidated when a new trading session opens.
+FIELD_GROUPS = {
+    "quote": {"ttl": QUOTE_CACHE_TTL, "daily": False},
+    "profile": {"ttl": 7 * 24 * 3600, "daily": False},
+    "fundamentals": {"ttl": 24 * 3600, "daily": True},
+}
+
+
+def trading_day(timestamp):
+    """Date of the trading session a UNIX timestamp belongs to.
+
+    Sessions start at the NYSE open; weekend timestamps belong to Friday's session.
+    """
+    local = datetime.fromtimestamp(timestamp, MARKET_TZ)
+    day = local.date()
+    if (local.hour, local.minute) < MARKET_OPEN:
+        day -= timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day
+
+
+class FundamentalsCache(SQLiteStore):
+    """Persistent Ticker.info cache in a local SQLite file."""
+
+    schema = (
+        """CREATE TABLE IF NOT EXISTS fundamentals (
+        ticker TEXT PRIMARY KEY,
+        info TEXT NOT NULL,
+        fetched_at REAL NOT NULL)""",
+    )
+
+    def __init__(self, path=fundamentals_file):
+        super().__init__(path)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(ticker):
+        return ticker.strip().upper()
+
+    @staticmethod
+    def is_fresh(fetched_at, group, now=None):
+        rules = FIELD_GROUPS[group]
+        now = now or time.time()
+        if now - fetched_at > rules["ttl"]:
+            return False
+        if rules["daily"] and trading_day(fetched_at) != trading_day(now):
+            return False
+        return True
+
+    def _read(self, ticker):
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT info, fetched_at FROM fundamentals WHERE ticker = ?",
+                (self._key(ticker),),
+            ).fetchone()
+
+    def _write(self, ticker, info):
+        with self._connect() as conn:
+            conn.execute(
+                """INSERT INTO fundamentals (ticker, info, fetched_at)
+                VALUES (?, ?, ?)
+                ON CONFLICT(ticker) DO UPDATE
+                SET info = excluded.info, fetched_at = excluded.fetched_at""",
+                (self._key(ticker), json.dumps(info, default=str), time.time()),
+            )
+
+    def get_info(self, ticker, group="fundamentals"):
+        """Ticker.info no older than the freshness rules of `group` allow."""
+        try:
+            row = self._read(ticker)
+        except sqlite3.Error as e:
+            logger.warning(f"Fundamentals cache read failed for {ticker}: {e}")
+            row = None
+
+        if row is not None and self.is_fresh(row[1], group):
+            with self._lock:
+                self.hits += 1
+            return json.loads(row[0])
+
+        with self._lock:
+            self.misses += 1
+
+        info = yahoo.get_info(ticker)
+        if isinstance(info, dict) and info:
+            try:
+                self._write(ticker, info)
+            except sqlite3.Error as e:
+                logger.warning(f"Fundamentals cache write failed for {ticker}: {e}")
+        return info
+
+    def invalidate(self, ticker=None):
+        with self._connect() as conn:
+            if ticker is None:
+                conn.execute("DELETE FROM fundamentals")
+            else:
+                conn.execute(
+                    "DELETE FROM fundamentals WHERE ticker = ?", (self._key(ticker),)
+                )
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+fundamentals_cache = FundamentalsCache()
@@ -0,0 +1,147 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from config import history_dir, logger
+from market import yahoo
+from market.periods import period_start
+
+COLUMNS = ["Open", "High", "Low", "Close", "Volume", "Dividends", "Stock Splits"]
+
+# Minimum number of seconds between two network refreshes of the same series
+REFRESH_INTERVALS = {"1d": 15 * 60, "1h": 5 * 60}
+DEFAULT_REFRESH_INTERVAL = 60
+
+
+class HistoryStore:
+    """On-disk OHLCV store, one memory-mappable .npy file per ticker and interval.
+
+    Row layout is [timestamp_ns, *COLUMNS]. A JSON sidecar keeps the covered
+    window, the exchange timezone and the last refresh time.
+    """
+
+    def __init__(self, root=history_dir):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+        self._locks = defaultdict(threading.Lock)
+        self._locks_guard = threading.Lock()
+
+    def _lock(self, key):
+        with self._locks_guard:
+            return self._locks[key]
+
+    def _paths(self, ticker, interval):
+        name = re.sub(r"[^A-Za-z0-9._-]", "_", ticker.strip().upper())
+        base = os.path.join(self.root, f"{name}_{interval}")
+        return base + ".npy", base + ".json"
+
+    def _load(self, ticker, interval):
+        data_path, meta_path = self._paths(ticker, interval)
+        if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+            return None, None
+        try:
+            with open(meta_path) as handle:
+                meta = json.load(handle)
+            return np.load(data_path, mmap_mode="r"), meta
+        except Exception as e:
+            logger.warning(f"Corrupted history for {ticker} ({interval}): {e}")
+            return None, None
+
+    def _save(self, ticker, interval, rows, meta):
+        data_path, meta_path = self._paths(ticker, interval)
+        tmp_data, tmp_meta = data_path + ".tmp", meta_path + ".tmp"
+        with open(tmp_data, "wb") as handle:
+            np.save(handle, rows)
+        with open(tmp_meta, "w") as handle:
+            json.dump(meta, handle)
+        os.replace(tmp_data, data_path)
+        os.replace(tmp_meta, meta_path)
+
+    @staticmethod
+    def _download(ticker, start, interval):
+        data = yahoo.get_history(ticker, start=start, interval=interval)
+        if data is None or data.empty:
+            return np.empty((0, len(COLUMNS) + 1)), None
+
+        data = data.reindex(columns=COLUMNS, fill_value=0.0)
+        index = data.index
+        tz = str(index.tz) if index.tz is not None else None
+        timestamps = (
+            index.tz_convert("UTC") if index.tz is not None else index
+        ).as_unit("ns").asi8.astype("float64")
+        rows = np.column_stack([timestamps, data.to_numpy(dtype="float64")])
+        return rows, tz
+
+    @staticmethod
+    def _merge(stored, fresh):
+        if len(fresh) == 0:
+            return np.asarray(stored)
+        keep = np.asarray(stored[stored[:, 0] < fresh[0, 0]])
+        return np.concatenate([keep, fresh], axis=0)
+
+    @staticmethod
+    def _has_corporate_actions(rows):
+        return bool(len(rows)) and bool(np.any(rows[:, -2:] != 0))
+
+    def _refresh(self, ticker, interval, start):
+        stored, meta = self._load(ticker, interval)
+        now = time.time()
+        start_ns = start.value
+
+        if stored is None or meta["covered_from"] > start_ns:
+            # Nothing on disk, or the window requested reaches further back
+            rows, tz = self._download(ticker, start.to_pydatetime(), interval)
+            meta = {"covered_from": start_ns, "tz": tz, "refreshed_at": now}
+            self._save(ticker, interval, rows, meta)
+            logger.debug(f"History {ticker} ({interval}): stored {len(rows)} bars")
+            return rows, meta
+
+        refresh_interval = REFRESH_INTERVALS.get(interval, DEFAULT_REFRESH_INTERVAL)
+        if now - meta["refreshed_at"] < refresh_interval or len(stored) == 0:
+            return stored, meta
+
+        last_ts = pd.Timestamp(int(stored[-1, 0]), tz="UTC")
+        fresh, tz = self._download(ticker, last_ts.to_pydatetime(), interval)
+
+        if self._has_corporate_actions(fresh[1:]):
+            # Adjusted prices before a dividend or split change, re-download all
+            covered_from = pd.Timestamp(meta["covered_from"], tz="UTC")
+            rows, tz = self._download(ticker, covered_from.to_pydatetime(), interval)
+        else:
+            rows = self._merge(stored, fresh)
+
+        meta = {
+            "covered_from": meta["covered_from"],
+            "tz": tz or meta.get("tz"),
+            "refreshed_at": now,
+        }
+        self._save(ticker, interval, rows, meta)
+        logger.debug(f"History {ticker} ({interval}): appended {len(fresh)} bars")
+        return rows, meta
+
+    def get_history(self, ticker, period="1y", interval="1d"):
+        """OHLCV bars for the last `period`, refreshing only the newest bars."""
+        start = period_start(period)
+        with self._lock((ticker.strip().upper(), interval)):
+            try:
+                rows, meta = self._refresh(ticker, interval, start)
+            except Exception as e:
+                logger.warning(f"History refresh failed for {ticker}: {e}")
+                rows, meta = self._load(ticker, interval)
+                if rows is None:
+                    return pd.DataFrame(columns=COLUMNS)
+
+        rows = np.asarray(rows[rows[:, 0] >= start.value])
+        index = pd.to_datetime(rows[:, 0].astype("int64"), utc=True)
+        if meta.get("tz"):
+            index = index.tz_convert(meta["tz"])
+        return pd.DataFrame(rows[:, 1:], index=index, columns=COLUMNS)
+
+
+history_store = HistoryStore()
@@ -0,0 +1,20 @@
+import re
+
+import pandas as pd
+
+
+def period_start(period, now=None):
+    """Translate a yfinance period string ("5d", "1mo", "2y") to a start timestamp."""
+    now = now or pd.Timestamp.now(tz="UTC")
+    match = re.fullmatch(r"(\d+)(d|wk|mo|y)", period.strip())
+    if not match:
+        raise ValueError(f"Unsupported period: {period}")
+
+    value, unit = int(match.group(1)), match.group(2)
+    if unit == "d":
+        return now - pd.offsets.BDay(value)
+    if unit == "wk":
+        return now - pd.DateOffset(weeks=value)
+    if unit == "mo":
+        return now - pd.DateOffset(months=value)
+    return now - pd.DateOffset(years=value)
@@ -0,0 +1,349 @@
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+
+import pandas as pd
+import requests
+import yfinance as yf
+
+from config import (
+    MARKET_DATA_PROVIDER,
+    MARKET_DATA_RECORD_DIR,
+    REPLAY_DIR,
+    REPLAY_ERROR_RATE,
+    REPLAY_LATENCY,
+    logger,
+)
+from market.periods import period_start
+
+
+def page_key(url):
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+
+def _utc_timestamp(value):
+    timestamp = pd.Timestamp(value)
+    if timestamp.tz is None:
+        return timestamp.tz_localize("UTC")
+    return timestamp.tz_convert("UTC")
+
+
+def _to_utc(data):
+    if data.index.tz is None:
+        return data.tz_localize("UTC")
+    return data.tz_convert("UTC")
+
+
+class DataProvider(ABC):
+    """Source of market data and news pages used by the rest of the bot."""
+
+    name = "base"
+
+    @abstractmethod
+    def get_info(self, ticker):
+        pass
+
+    @abstractmethod
+    def get_recommendations(self, ticker):
+        pass
+
+    @abstractmethod
+    def get_history(self, ticker, **kwargs):
+        pass
+
+    @abstractmethod
+    def download(self, tickers, **kwargs):
+        pass
+
+    @abstractmethod
+    def fetch_page(self, url, headers=None, timeout=None, session=None):
+        pass
+
+
+class YahooProvider(DataProvider):
+    """Live data from Yahoo Finance and the news sites themselves."""
+
+    name = "yahoo"
+
+    def get_info(self, ticker):
+        return yf.Ticker(ticker).info
+
+    def get_recommendations(self, ticker):
+        return yf.Ticker(ticker).recommendations
+
+    def get_history(self, ticker, **kwargs):
+        return yf.Ticker(ticker).history(**kwargs)
+
+    def download(self, tickers, **kwargs):
+        return yf.download(tickers=tickers, **kwargs)
+
+    def fetch_page(self, url, headers=None, timeout=None, session=None):
+        return (session or requests).get(url, headers=headers, timeout=timeout)
+
+
+class ReplayResponse:
+    """The subset of requests.Response the scrapers rely on."""
+
+    def __init__(self, url, status_code, text, headers=None):
+        self.url = url
+        self.status_code = status_code
+        self.text = text
+        self.content = text.encode("utf-8")
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(
+                f"{self.status_code} Error for url: {self.url}", response=self
+            )
+
+
+class ReplayProvider(DataProvider):
+    """Serves recorded data from a fixture directory, no network needed.
+
+    Layout::
+
+        info/<TICKER>.json
+        recommendations/<TICKER>.csv
+        history/<TICKER>_<interval>.csv
+        pages/<sha1(url)>.html
+
+    History is shifted by whole weeks so the last recorded bar falls in the
+    current week, which keeps period windows meaningful on old fixtures.
+    `latency` seconds are added to every call and `error_rate` of the calls
+    fail with a connection error.
+    """
+
+    name = "replay"
+
+    def __init__(self, directory, latency=0.0, error_rate=0.0, seed=None):
+        self.directory = directory
+        self.latency = latency
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.injected_errors = 0
+        self._substituted = set()
+
+    def _simulate(self, what):
+        with self._lock:
+            self.calls += 1
+            fail = self._random.random() < self.error_rate
+            if fail:
+                self.injected_errors += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            raise requests.exceptions.ConnectionError(f"Injected replay error: {what}")
+
+    def _warn_substituted(self, ticker, interval):
+        key = (self._symbol(ticker), interval)
+        with self._lock:
+            if key in self._substituted:
+                return
+            self._substituted.add(key)
+        logger.warning(
+            f"No {interval} replay history for {key[0]}, serving 1d bars instead"
+        )
+
+    def _path(self, *parts):
+        return os.path.join(self.directory, *parts)
+
+    @staticmethod
+    def _symbol(ticker):
+        return ticker.strip().upper()
+
+    def get_info(self, ticker):
+        self._simulate(f"info {ticker}")
+        path = self._path("info", f"{self._symbol(ticker)}.json")
+        if not os.path.exists(path):
+            return {}
+        with open(path) as handle:
+            return json.load(handle)
+
+    def get_recommendations(self, ticker):
+        self._simulate(f"recommendations {ticker}")
+        path = self._path("recommendations", f"{self._symbol(ticker)}.csv")
+        if not os.path.exists(path):
+            return None
+        return pd.read_csv(path)
+
+    def _load_history(self, ticker, interval):
+        for candidate in (interval, "1d"):
+            path = self._path("history", f"{self._symbol(ticker)}_{candidate}.csv")
+            if os.path.exists(path):
+                break
+        else:
+            return pd.DataFrame()
+        if candidate != interval:
+            self._warn_substituted(ticker, interval)
+
+        data = pd.read_csv(path, index_col=0)
+        data.index = pd.to_datetime(data.index, utc=True)
+        if data.empty:
+            return data
+
+        weeks = (pd.Timestamp.now(tz="UTC") - data.index[-1]).days // 7
+        data.index = data.index + pd.Timedelta(weeks=max(weeks, 0))
+        return data
+
+    def get_history(
+        self, ticker, period=None, interval="1d", start=None, end=None, **kwargs
+    ):
+        self._simulate(f"history {ticker}")
+        data = self._load_history(ticker, interval)
+        if data.empty:
+            return data
+        if start is None and period and period != "max":
+            # Like Yahoo, a period counts back from the last available bar
+            start = period_start(period, now=data.index[-1])
+        if start is not None:
+            data = data[data.index >= _utc_timestamp(start)]
+        if end is not None:
+            data = data[data.index < _utc_timestamp(end)]
+        return data
+
+    def download(self, tickers, period="1mo", interval="1d", **kwargs):
+        self._simulate(f"download {len(tickers)} tickers")
+        frames = {}
+        for ticker in tickers:
+            data = self._load_history(ticker, interval)
+            if not data.empty:
+                start = period_start(period, now=data.index[-1])
+                frames[self._symbol(ticker)] = data[data.index >= start]
+        if not frames:
+            return pd.DataFrame()
+        combined = pd.concat(frames, axis=1)
+        return combined.swaplevel(0, 1, axis=1).sort_index(axis=1)
+
+    def fetch_page(self, url, headers=None, timeout=None, session=None):
+        self._simulate(f"page {url}")
+        path = self._path("pages", f"{page_key(url)}.html")
+        if not os.path.exists(path):
+            return ReplayResponse(url, 404, "")
+        with open(path, encoding="utf-8") as handle:
+            return ReplayResponse(url, 200, handle.read())
+
+
+class RecordingProvider(DataProvider):
+    """Pass-through provider that writes every response as a replay fixture."""
+
+    def __init__(self, inner, directory):
+        self.inner = inner
+        self.directory = directory
+        self.name = f"recording:{inner.name}"
+
+    def _write(self, folder, filename, write):
+        path = os.path.join(self.directory, folder, filename)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            write(path)
+        except Exception as e:
+            logger.warning(f"Failed to record fixture {path}: {e}")
+
+    def get_info(self, ticker):
+        info = self.inner.get_info(ticker)
+        if info:
+
+            def write(path):
+                with open(path, "w") as handle:
+                    json.dump(info, handle, default=str)
+
+            self._write("info", f"{ticker.strip().upper()}.json", write)
+        return info
+
+    def get_recommendations(self, ticker):
+        recommendations = self.inner.get_recommendations(ticker)
+        if recommendations is not None and not recommendations.empty:
+            self._write(
+                "recommendations",
+                f"{ticker.strip().upper()}.csv",
+                recommendations.to_csv,
+            )
+        return recommendations
+
+    def _record_history(self, ticker, interval, data):
+        def write(path):
+            merged = _to_utc(data)
+            if os.path.exists(path):
+                existing = pd.read_csv(path, index_col=0)
+                existing.index = pd.to_datetime(existing.index, utc=True)
+                merged = pd.concat([existing, merged])
+                merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+            merged.to_csv(path)
+
+        self._write("history", f"{ticker.strip().upper()}_{interval}.csv", write)
+
+    def get_history(self, ticker, **kwargs):
+        data = self.inner.get_history(ticker, **kwargs)
+        if data is not None and not data.empty:
+            self._record_history(ticker, kwargs.get("interval", "1d"), data)
+        return data
+
+    @staticmethod
+    def _split_download(data, tickers):
+        """{ticker: frame} from a yf.download result, either column grouping."""
+        if not isinstance(data.columns, pd.MultiIndex):
+            return {tickers[0]: data} if len(tickers) == 1 else {}
+        for level in range(data.columns.nlevels):
+            symbols = set(data.columns.get_level_values(level))
+            if symbols & set(tickers):
+                return {
+                    ticker: data.xs(ticker, axis=1, level=level).dropna(how="all")
+                    for ticker in tickers
+                    if ticker in symbols
+                }
+        return {}
+
+    def download(self, tickers, **kwargs):
+        data = self.inner.download(tickers, **kwargs)
+        if data is not None and not data.empty:
+            if isinstance(tickers, str):
+                tickers = tickers.split()
+            interval = kwargs.get("interval", "1d")
+            for ticker, frame in self._split_download(data, list(tickers)).items():
+                if not frame.empty:
+                    self._record_history(ticker, interval, frame)
+        return data
+
+    def fetch_page(self, url, headers=None, timeout=None, session=None):
+        response = self.inner.fetch_page(url, headers, timeout, session)
+        if response.status_code == 200:
+
+            def write(path):
+                with open(path, "w", encoding="utf-8") as handle:
+                    handle.write(response.text)
+
+            self._write("pages", f"{page_key(url)}.html", write)
+        return response
+
+
+def _create_provider():
+    if MARKET_DATA_PROVIDER == "replay":
+        provider = ReplayProvider(REPLAY_DIR, REPLAY_LATENCY, REPLAY_ERROR_RATE)
+    else:
+        provider = YahooProvider()
+
+    if MARKET_DATA_RECORD_DIR:
+        provider = RecordingProvider(provider, MARKET_DATA_RECORD_DIR)
+
+    logger.info(f"Market data provider: {provider.name}")
+    return provider
+
+
+_provider = _create_provider()
+
+
+def get_provider():
+    return _provider
+
+
+def set_provider(provider):
+    """Swap the active provider, e.g. to a ReplayProvider in benchmarks."""
+    global _provider
+    _provider = provider
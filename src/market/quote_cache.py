@@ -0,0 +1,72 @@
+import threading
+import time
+from collections import OrderedDict
+
+from config import NAME_CACHE_TTL, QUOTE_CACHE_SIZE, QUOTE_CACHE_TTL
+
+
+class QuoteCache:
+    """Thread-safe TTL cache with LRU eviction, keyed by ticker."""
+
+    def __init__(self, ttl=QUOTE_CACHE_TTL, max_size=QUOTE_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(ticker):
+        return ticker.strip().upper()
+
+    def get(self, ticker):
+        key = self._key(ticker)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, ticker, value, ttl=None):
+        key = self._key(ticker)
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, ticker=None):
+        with self._lock:
+            if ticker is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(self._key(ticker), None)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+quote_cache = QuoteCache()
+name_cache = QuoteCache(ttl=NAME_CACHE_TTL)
@@ -0,0 +1,81 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """Blocking token bucket with adaptive slow-down.
+
+    `penalize` halves the refill rate (down to `min_rate`) and drains the
+    bucket, `reward` raises it back additively towards `rate`.
+    """
+
+    def __init__(self, rate, burst, min_rate=None, recovery=0.1):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate or rate / 10
+        self.burst = burst
+        self.recovery = recovery * rate
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._cond = threading.Condition()
+
+        self.acquired = 0
+        self.throttled = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Block until a token is available, return the time spent waiting."""
+        started = time.monotonic()
+        with self._cond:
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        break
+                    self._cond.wait((1 - self._tokens) / self.rate)
+            finally:
+                self.waiting -= 1
+
+            waited = time.monotonic() - started
+            self.acquired += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            self._cond.notify()
+            return waited
+
+    def penalize(self):
+        with self._cond:
+            self._refill(time.monotonic())
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = min(self._tokens, 0.0)
+            self.throttled += 1
+
+    def reward(self):
+        with self._cond:
+            if self.rate < self.max_rate:
+                self._refill(time.monotonic())
+                self.rate = min(self.max_rate, self.rate + self.recovery)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "rate": self.rate,
+                "acquired": self.acquired,
+                "throttled": self.throttled,
+                "queue_depth": self.waiting,
+                "max_queue_depth": self.max_waiting,
+                "avg_wait": self.total_wait / self.acquired if self.acquired else 0.0,
+                "max_wait": self.max_wait,
+            }
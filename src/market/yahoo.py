@@ -0,0 +1,90 @@
+from config import YAHOO_BURST, YAHOO_MAX_RETRIES, YAHOO_MIN_RPS, YAHOO_RPS, logger
+from market.providers import get_provider
+from market.rate_limiter import RateLimiter
+from market.single_flight import SingleFlight
+
+yahoo_flight = SingleFlight()
+yahoo_limiter = RateLimiter(YAHOO_RPS, YAHOO_BURST, min_rate=YAHOO_MIN_RPS)
+
+
+def _key(ticker, endpoint):
+    return ticker.strip().upper(), endpoint
+
+
+def _is_rate_limited(error):
+    text = str(error)
+    return (
+        type(error).__name__ == "YFRateLimitError"
+        or "429" in text
+        or "Too Many Requests" in text
+        or "Rate limited" in text
+    )
+
+
+def _is_empty(result):
+    if result is None:
+        return True
+    if hasattr(result, "empty"):
+        return result.empty
+    if isinstance(result, dict):
+        return not result
+    return False
+
+
+def call(fn, *args, **kwargs):
+    """Run a yfinance call under the global rate limiter.
+
+    Rate-limit errors slow the limiter down and are retried up to
+    YAHOO_MAX_RETRIES times; other errors propagate immediately. Empty
+    results are left alone: invalid tickers and ETFs without analyst data
+    legitimately return nothing.
+    """
+    attempts = YAHOO_MAX_RETRIES + 1
+    for attempt in range(attempts):
+        yahoo_limiter.acquire()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            if not _is_rate_limited(e) or attempt == attempts - 1:
+                raise
+            yahoo_limiter.penalize()
+            logger.warning(
+                f"Yahoo rate limit hit ({attempt + 1}/{attempts}), "
+                f"slowing down to {yahoo_limiter.rate:.2f} req/s"
+            )
+            continue
+
+        if not _is_empty(result):
+            yahoo_limiter.reward()
+        return result
+
+
+def _download_info(ticker):
+    return call(lambda: get_provider().get_info(ticker))
+
+
+def _download_recommendations(ticker):
+    return call(lambda: get_provider().get_recommendations(ticker))
+
+
+def get_info(ticker):
+    """Ticker.info, shared between concurrent callers asking for the same ticker."""
+    return yahoo_flight.do(_key(ticker, "info"), _download_info, ticker)
+
+
+def get_recommendations(ticker):
+    return yahoo_flight.do(
+        _key(ticker, "recommendations"), _download_recommendations, ticker
+    )
+
+
+def get_history(ticker, **kwargs):
+    return call(lambda: get_provider().get_history(ticker, **kwargs))
+
+
+def download(tickers, **kwargs):
+    return call(lambda: get_provider().download(tickers, **kwargs))
+
+
+def stats():
+    return {"limiter": yahoo_limiter.stats(), "single_flight": yahoo_flight.stats()}
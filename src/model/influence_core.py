@@ -1,23 +1,133 @@
+import json
 import os
 import pickle
 import re
+import threading
 
 import numpy as np
-from tensorflow.keras.models import load_model
-from tensorflow.keras.preprocessing.sequence import pad_sequences
 
-MODEL_DIR = "/app/src/IPSA_MODEL/news"
+from model.sentiment_cache import file_digest, sentiment_cache, sequence_key
+from model.vocab import CompiledVocabulary
+
+MODEL_DIR = os.getenv(
+    "INFLUENCE_MODEL_DIR",
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "IPSA_MODEL", "news"
+    ),
+)
 MODEL_PATH = os.path.join(MODEL_DIR, "sentiment_model.keras")
 TOKENIZER_PATH = os.path.join(MODEL_DIR, "tokenizer.pickle")
+NUMPY_MODEL_PATH = os.path.join(MODEL_DIR, "sentiment_model.npz")
+
+# "keras" or "numpy"; the NumPy engine needs `python -m model.numpy_engine export` first
+ENGINE = os.getenv("INFLUENCE_ENGINE", "keras")
+
+MAX_LEN = 100
+MAX_BATCH_SIZE = int(os.getenv("INFLUENCE_BATCH_SIZE", "64"))
+
+
+class KerasEngine:
+    name = "keras"
+
+    def __init__(self, model_path, tokenizer_path):
+        from tensorflow.keras.models import load_model
+        from tensorflow.keras.preprocessing.sequence import pad_sequences
+
+        self._pad_sequences = pad_sequences
+        self.model = load_model(model_path)
+        with open(tokenizer_path, "rb") as handle:
+            self.tokenizer = pickle.load(handle)
+        self.vocabulary = CompiledVocabulary.from_word_index(
+            self.tokenizer.word_index,
+            self.tokenizer.num_words,
+            self.tokenizer.oov_token,
+        )
+        self.version = f"keras-{file_digest(model_path, tokenizer_path)}"
+
+    def encode(self, texts, max_len):
+        return self.vocabulary.encode(texts, max_len)
+
+    def reference_encode(self, texts, max_len):
+        sequences = self.tokenizer.texts_to_sequences(texts)
+        return self._pad_sequences(
+            sequences, maxlen=max_len, padding="post", truncating="post"
+        )
+
+    def predict(self, padded, batch_size):
+        return self.model.predict(padded, batch_size=batch_size, verbose=0)[:, 0]
+
+
+def load_engine(name=ENGINE):
+    if name == "numpy":
+        from model.numpy_engine import NumpyEngine
 
-try:
-    model = load_model(MODEL_PATH)
+        return NumpyEngine(NUMPY_MODEL_PATH)
+    return KerasEngine(MODEL_PATH, TOKENIZER_PATH)
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """The inference engine, loaded on first use."""
+    global _engine
+
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                try:
+                    engine = load_engine()
+                except FileNotFoundError as e:
+                    raise FileNotFoundError(f"Could not load model or tokenizer: {e}")
+                sentiment_cache.bind(engine.version)
+                _engine = engine
+    return _engine
+
+
+def is_ready():
+    return _engine is not None
+
+
+def load_vocabulary(name=ENGINE):
+    """The engine's vocabulary, read without loading the model."""
+    if name == "numpy":
+        with np.load(NUMPY_MODEL_PATH, allow_pickle=False) as data:
+            tokenizer = json.loads(str(data["tokenizer"]))
+        return CompiledVocabulary.from_word_index(
+            tokenizer["word_index"], tokenizer["num_words"], tokenizer["oov_token"]
+        )
     with open(TOKENIZER_PATH, "rb") as handle:
         tokenizer = pickle.load(handle)
-except FileNotFoundError as e:
-    raise FileNotFoundError(f"Could not load model or tokenizer: {e}")
+    return CompiledVocabulary.from_word_index(
+        tokenizer.word_index, tokenizer.num_words, tokenizer.oov_token
+    )
 
-MAX_LEN = 100
+
+_vocabulary = None
+_vocabulary_lock = threading.Lock()
+
+
+def get_vocabulary():
+    """Vocabulary of the inference engine.
+
+    Body extraction calls this from the fetch pool, so it must not load the
+    model itself; that stays on the compute worker.
+    """
+    global _vocabulary
+
+    if _vocabulary is None:
+        with _vocabulary_lock:
+            if _vocabulary is None:
+                engine = _engine
+                _vocabulary = (
+                    engine.vocabulary if engine is not None else load_vocabulary()
+                )
+    return _vocabulary
+
+
+def in_vocabulary(word):
+    return word in get_vocabulary()
 
 
 def clean_text(text):
@@ -27,23 +137,58 @@ def clean_text(text):
     return text.lower()
 
 
+def _format_influence(probability):
+    influence = "Positive Influence" if probability > 0.5 else "Negative Influence"
+    return f"{influence} (Probability: {probability:.1f})"
+
+
+def _predict_cached(engine, padded_sequences, max_batch_size):
+    keys = [sequence_key(sequence) for sequence in padded_sequences]
+    known = sentiment_cache.get_many(keys)
+
+    missing = {}
+    for key, sequence in zip(keys, padded_sequences):
+        if key not in known and key not in missing:
+            missing[key] = sequence
+    if missing:
+        predicted = engine.predict(np.stack(list(missing.values())), max_batch_size)
+        fresh = dict(zip(missing, predicted))
+        sentiment_cache.put_many(fresh)
+        known.update(fresh)
+    return [known[key] for key in keys]
+
+
+def predict_price_influence_batch(
+    news_articles, max_batch_size=MAX_BATCH_SIZE, use_cache=True
+):
+    """Predict the price influence of several news articles in one pass.
+
+    Inputs the model has already seen are answered from the sentiment cache.
+    """
+    if not news_articles:
+        return []
+
+    cleaned_articles = [clean_text(article) for article in news_articles]
+    engine = get_engine()
+    padded_sequences = engine.encode(cleaned_articles, MAX_LEN)
+    if use_cache:
+        probabilities = _predict_cached(engine, padded_sequences, max_batch_size)
+    else:
+        probabilities = engine.predict(padded_sequences, max_batch_size)
+    return [_format_influence(probability) for probability in probabilities]
+
+
 def predict_price_influence(news_article):
     """Predict the price influence of a news article."""
-    cleaned_article = clean_text(news_article)
-    sequence = tokenizer.texts_to_sequences([cleaned_article])
-    padded_sequence = pad_sequences(
-        sequence, maxlen=MAX_LEN, padding="post", truncating="post"
-    )
+    return predict_price_influence_batch([news_article])[0]
 
-    prediction = model.predict(padded_sequence, verbose=0)
-    probability = prediction[0][0]
 
-    influence = "Positive Influence" if probability > 0.5 else "Negative Influence"
-    return f"{influence} (Probability: {probability:.1f})"
+def warm_up():
+    """Load the model and run one dummy inference so the first real call is fast."""
+    predict_price_influence_batch(["market update"], use_cache=False)
 
 
-if __name__ == "__main__":
-    new_article = """
+SAMPLE_ARTICLE = """
     (Reuters) -The U.S. Treasury has informed Japan's Nippon Steel that the panel reviewing its proposed $14.9 billion purchase of U.S. Steel has not yet come to an agreement on how to address security concerns, the Financial Times reported on Sunday.
     Treasury, which leads the Committee on Foreign Investment in the U.S. (CFIUS), wrote to both companies on Saturday saying the nine agencies on the panel were struggling to reach a consensus ahead of the deadline to submit a recommendation to President Joe Biden, the report added, citing several sources familiar with the talks.
     CFIUS, a powerful committee charged with reviewing foreign investments in U.S. firms for national security risks, has until Dec. 22 to make a decision on whether to approve, block or extend the timeline for the deal's review, Reuters has reported.
@@ -52,5 +197,7 @@ if __name__ == "__main__":
     CFIUS told the two companies in September that the deal would create national security risks because it could hurt the supply of steel needed for critical transportation, construction and agriculture projects, according to a letter seen by Reuters.
     """
 
-    result = predict_price_influence(new_article)
+
+if __name__ == "__main__":
+    result = predict_price_influence(SAMPLE_ARTICLE)
     print(f"Predicted Influence: {result}")
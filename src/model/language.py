@@ -0,0 +1,71 @@
+import re
+import threading
+from collections import Counter
+
+from model import influence_core
+
+CYRILLIC = re.compile(r"[\u0400-\u04FF]")
+LATIN = re.compile(r"[a-zA-Z]")
+SAMPLE_CHARS = 2000
+
+
+def detect_language(text):
+    """Language code ("ru", "en" or "unknown") by the dominant script of the text."""
+    sample = text[:SAMPLE_CHARS]
+    cyrillic = len(CYRILLIC.findall(sample))
+    latin = len(LATIN.findall(sample))
+    if not cyrillic and not latin:
+        return "unknown"
+    return "ru" if cyrillic > latin else "en"
+
+
+class LanguageRouter:
+    """Sends every text to the sentiment model registered for its language.
+
+    Texts in languages without a model are not run through inference at all.
+    """
+
+    def __init__(self):
+        self.models = {}
+        self._lock = threading.Lock()
+        self.articles = Counter()
+        self.skipped = 0
+
+    def register(self, language, predict_batch):
+        """`predict_batch(texts)` must return one influence string per text."""
+        self.models[language] = predict_batch
+
+    def classify(self, texts):
+        languages = [detect_language(text) for text in texts]
+        results = [None] * len(texts)
+
+        by_language = {}
+        for index, language in enumerate(languages):
+            by_language.setdefault(language, []).append(index)
+
+        for language, indexes in by_language.items():
+            predict_batch = self.models.get(language)
+            if predict_batch is None:
+                for index in indexes:
+                    results[index] = f"Influence not available ({language})"
+                continue
+            influences = predict_batch([texts[index] for index in indexes])
+            for index, influence in zip(indexes, influences):
+                results[index] = influence
+
+        with self._lock:
+            self.articles.update(languages)
+            self.skipped += sum(
+                len(indexes)
+                for language, indexes in by_language.items()
+                if language not in self.models
+            )
+        return results
+
+    def stats(self):
+        with self._lock:
+            return {"articles": dict(self.articles), "inference_skipped": self.skipped}
+
+
+language_router = LanguageRouter()
+language_router.register("en", influence_core.predict_price_influence_batch)
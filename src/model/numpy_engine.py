@@ -0,0 +1,502 @@
+"""TensorFlow-free inference for the news sentiment model.
+
+The Keras model and tokenizer are exported once into a single .npz file
+holding the layer weights, a JSON description of the layers and the
+vocabulary. NumpyEngine then runs the same forward pass with NumPy only.
+
+    python -m model.numpy_engine export      # write sentiment_model.npz
+    python -m model.numpy_engine parity      # compare against Keras
+    python -m model.numpy_engine benchmark   # latency and memory of both engines
+"""
+
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from model.sentiment_cache import file_digest
+from model.vocab import CompiledVocabulary
+
+DROPOUT_LAYERS = {
+    "Dropout",
+    "SpatialDropout1D",
+    "GaussianDropout",
+    "GaussianNoise",
+    "AlphaDropout",
+    "ActivityRegularization",
+}
+RNN_LAYERS = {"LSTM", "GRU", "SimpleRNN"}
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def _hard_sigmoid(x):
+    return np.clip(x / 6.0 + 0.5, 0.0, 1.0)
+
+
+def _softmax(x):
+    e = np.exp(x - x.max(axis=-1, keepdims=True))
+    return e / e.sum(axis=-1, keepdims=True)
+
+
+ACTIVATIONS = {
+    "linear": lambda x: x,
+    None: lambda x: x,
+    "relu": lambda x: np.maximum(x, 0.0),
+    "sigmoid": _sigmoid,
+    "hard_sigmoid": _hard_sigmoid,
+    "tanh": np.tanh,
+    "softmax": _softmax,
+}
+
+
+def _activation(name):
+    if name not in ACTIVATIONS:
+        raise ValueError(f"Unsupported activation: {name}")
+    return ACTIVATIONS[name]
+
+
+# Export (needs TensorFlow)
+
+
+def _activation_name(value):
+    if isinstance(value, dict):
+        value = value.get("config", {}).get("name", value.get("class_name"))
+    return value
+
+
+def _layer_spec(layer, arrays, key):
+    """Describe a Keras layer and put its weights into `arrays`."""
+    kind = type(layer).__name__
+    config = layer.get_config()
+    spec = {"type": kind}
+
+    if kind == "Bidirectional":
+        spec["merge_mode"] = config.get("merge_mode", "concat")
+        spec["forward"] = _layer_spec(layer.forward_layer, arrays, f"{key}f")
+        spec["backward"] = _layer_spec(layer.backward_layer, arrays, f"{key}b")
+        return spec
+
+    if kind == "Embedding":
+        spec["mask_zero"] = bool(config.get("mask_zero", False))
+    elif kind == "Dense":
+        spec["activation"] = _activation_name(config.get("activation"))
+    elif kind in RNN_LAYERS:
+        spec["activation"] = _activation_name(config.get("activation", "tanh"))
+        spec["recurrent_activation"] = _activation_name(
+            config.get("recurrent_activation", "sigmoid")
+        )
+        spec["return_sequences"] = bool(config.get("return_sequences", False))
+        spec["go_backwards"] = bool(config.get("go_backwards", False))
+        spec["reset_after"] = bool(config.get("reset_after", True))
+    elif kind == "Conv1D":
+        if tuple(config.get("dilation_rate", (1,))) != (1,):
+            raise ValueError("Dilated Conv1D is not supported")
+        spec["activation"] = _activation_name(config.get("activation"))
+        spec["strides"] = int(config.get("strides", (1,))[0])
+        spec["padding"] = config.get("padding", "valid")
+    elif kind == "MaxPooling1D":
+        spec["pool_size"] = int(config.get("pool_size", (2,))[0])
+        strides = config.get("strides") or config.get("pool_size", (2,))
+        spec["strides"] = int(strides[0])
+    elif kind not in DROPOUT_LAYERS | {
+        "GlobalAveragePooling1D",
+        "GlobalMaxPooling1D",
+        "Flatten",
+        "InputLayer",
+    }:
+        raise ValueError(f"Layer {kind} is not supported by the NumPy engine")
+
+    spec["weights"] = []
+    for index, weight in enumerate(layer.get_weights()):
+        name = f"{key}_{index}"
+        arrays[name] = np.asarray(weight, dtype=np.float32)
+        spec["weights"].append(name)
+    return spec
+
+
+def export_model(model, tokenizer, output_path):
+    """Write a Keras Sequential model and its Tokenizer to a NumPy weight file."""
+    arrays = {}
+    layers = [
+        _layer_spec(layer, arrays, f"w{index}")
+        for index, layer in enumerate(model.layers)
+    ]
+    vocabulary = {
+        "word_index": tokenizer.word_index,
+        "num_words": tokenizer.num_words,
+        "oov_token": tokenizer.oov_token,
+        "lower": tokenizer.lower,
+        "filters": tokenizer.filters,
+        "split": tokenizer.split,
+    }
+    np.savez_compressed(
+        output_path,
+        layers=np.array(json.dumps(layers)),
+        tokenizer=np.array(json.dumps(vocabulary)),
+        **arrays,
+    )
+    print(f"Exported {len(layers)} layers to {output_path}")
+
+
+# Forward pass
+
+
+def _rnn(spec, weights, x, mask, zero_masked_outputs=False):
+    kind = spec["type"]
+    kernel, recurrent_kernel = weights[0], weights[1]
+    bias = weights[2] if len(weights) > 2 else None
+    activation = _activation(spec["activation"])
+    recurrent_activation = _activation(spec["recurrent_activation"])
+    units = recurrent_kernel.shape[0]
+    batch, steps, _ = x.shape
+
+    if spec["go_backwards"]:
+        x = x[:, ::-1]
+        mask = mask[:, ::-1] if mask is not None else None
+
+    if kind == "GRU" and spec["reset_after"] and bias is not None:
+        input_bias, recurrent_bias = bias[0], bias[1]
+    else:
+        input_bias, recurrent_bias = bias, None
+
+    # Input projections for all timesteps at once
+    projected = x @ kernel
+    if input_bias is not None:
+        projected = projected + input_bias
+
+    h = np.zeros((batch, units), dtype=np.float32)
+    c = np.zeros((batch, units), dtype=np.float32)
+    outputs = np.zeros((batch, steps, units), dtype=np.float32)
+
+    for t in range(steps):
+        z = projected[:, t]
+        if kind == "LSTM":
+            z = z + h @ recurrent_kernel
+            i = recurrent_activation(z[:, :units])
+            f = recurrent_activation(z[:, units : 2 * units])
+            c_new = f * c + i * activation(z[:, 2 * units : 3 * units])
+            o = recurrent_activation(z[:, 3 * units :])
+            h_new = o * activation(c_new)
+        elif kind == "GRU":
+            if spec["reset_after"]:
+                inner = h @ recurrent_kernel
+                if recurrent_bias is not None:
+                    inner = inner + recurrent_bias
+                update = recurrent_activation(z[:, :units] + inner[:, :units])
+                reset = recurrent_activation(
+                    z[:, units : 2 * units] + inner[:, units : 2 * units]
+                )
+                candidate = activation(z[:, 2 * units :] + reset * inner[:, 2 * units :])
+            else:
+                inner = h @ recurrent_kernel[:, : 2 * units]
+                update = recurrent_activation(z[:, :units] + inner[:, :units])
+                reset = recurrent_activation(z[:, units : 2 * units] + inner[:, units:])
+                candidate = activation(
+                    z[:, 2 * units :] + (reset * h) @ recurrent_kernel[:, 2 * units :]
+                )
+            h_new = update * h + (1.0 - update) * candidate
+            c_new = c
+        else:
+            h_new = activation(z + h @ recurrent_kernel)
+            c_new = c
+
+        if mask is not None:
+            # Padded steps carry the previous state forward
+            keep = mask[:, t : t + 1]
+            h = np.where(keep, h_new, h)
+            c = np.where(keep, c_new, c)
+            outputs[:, t] = np.where(keep, h_new, 0.0 if zero_masked_outputs else h)
+        else:
+            h, c = h_new, c_new
+            outputs[:, t] = h
+
+    if spec["return_sequences"]:
+        return outputs, (mask[:, ::-1] if spec["go_backwards"] and mask is not None else mask)
+    return h, None
+
+
+def _bidirectional(spec, weights, x, mask):
+    forward, forward_mask = _rnn(
+        spec["forward"],
+        weights["forward"],
+        x,
+        mask,
+        zero_masked_outputs=spec["forward"]["return_sequences"],
+    )
+    backward, _ = _rnn(
+        spec["backward"],
+        weights["backward"],
+        x,
+        mask,
+        zero_masked_outputs=spec["backward"]["return_sequences"],
+    )
+    if spec["backward"]["return_sequences"]:
+        backward = backward[:, ::-1]
+
+    merge_mode = spec["merge_mode"]
+    if merge_mode == "concat":
+        merged = np.concatenate([forward, backward], axis=-1)
+    elif merge_mode == "sum":
+        merged = forward + backward
+    elif merge_mode == "mul":
+        merged = forward * backward
+    elif merge_mode == "ave":
+        merged = (forward + backward) / 2.0
+    else:
+        raise ValueError(f"Unsupported merge mode: {merge_mode}")
+    return merged, forward_mask
+
+
+def _conv1d(spec, weights, x):
+    kernel = weights[0]
+    size = kernel.shape[0]
+    if spec["padding"] == "same":
+        left = (size - 1) // 2
+        x = np.pad(x, ((0, 0), (left, size - 1 - left), (0, 0)))
+    elif spec["padding"] == "causal":
+        x = np.pad(x, ((0, 0), (size - 1, 0), (0, 0)))
+    windows = np.lib.stride_tricks.sliding_window_view(x, size, axis=1)
+    output = np.einsum("ntck,kcf->ntf", windows, kernel)[:, :: spec["strides"]]
+    if len(weights) > 1:
+        output = output + weights[1]
+    return _activation(spec["activation"])(output)
+
+
+def _forward_layer(spec, weights, x, mask):
+    kind = spec["type"]
+    if kind == "Embedding":
+        return weights[0][x], (x != 0) if spec["mask_zero"] else None
+    if kind in DROPOUT_LAYERS or kind == "InputLayer":
+        return x, mask
+    if kind == "Dense":
+        output = x @ weights[0]
+        if len(weights) > 1:
+            output = output + weights[1]
+        return _activation(spec["activation"])(output), mask
+    if kind in RNN_LAYERS:
+        return _rnn(spec, weights, x, mask)
+    if kind == "Bidirectional":
+        return _bidirectional(spec, weights, x, mask)
+    if kind == "Conv1D":
+        return _conv1d(spec, weights, x), None
+    if kind == "MaxPooling1D":
+        windows = np.lib.stride_tricks.sliding_window_view(
+            x, spec["pool_size"], axis=1
+        )
+        return windows.max(axis=-1)[:, :: spec["strides"]], None
+    if kind == "GlobalAveragePooling1D":
+        if mask is None:
+            return x.mean(axis=1), None
+        weights_ = mask[:, :, None].astype(np.float32)
+        return (x * weights_).sum(axis=1) / np.maximum(weights_.sum(axis=1), 1.0), None
+    if kind == "GlobalMaxPooling1D":
+        return x.max(axis=1), None
+    if kind == "Flatten":
+        return x.reshape(x.shape[0], -1), None
+    raise ValueError(f"Layer {kind} is not supported by the NumPy engine")
+
+
+class NumpyEngine:
+    """Sentiment model forward pass in plain NumPy, loaded from an exported .npz."""
+
+    name = "numpy"
+
+    def __init__(self, path):
+        self.version = f"numpy-{file_digest(path)}"
+        with np.load(path, allow_pickle=False) as data:
+            self.layers = json.loads(str(data["layers"]))
+            vocabulary = json.loads(str(data["tokenizer"]))
+            self.weights = [self._collect(spec, data) for spec in self.layers]
+
+        self.word_index = vocabulary["word_index"]
+        self.num_words = vocabulary["num_words"]
+        self.lower = vocabulary["lower"]
+        self.split = vocabulary["split"]
+        self._filters = str.maketrans(
+            {char: self.split for char in vocabulary["filters"]}
+        )
+        oov_token = vocabulary["oov_token"]
+        self.oov_index = (
+            self.word_index.get(oov_token) if oov_token is not None else None
+        )
+        self.vocabulary = CompiledVocabulary.from_word_index(
+            self.word_index, self.num_words, oov_token
+        )
+
+    def _collect(self, spec, data):
+        if spec["type"] == "Bidirectional":
+            return {
+                "forward": self._collect(spec["forward"], data),
+                "backward": self._collect(spec["backward"], data),
+            }
+        return [data[name] for name in spec["weights"]]
+
+    def texts_to_sequences(self, texts):
+        """Same output as keras Tokenizer.texts_to_sequences."""
+        sequences = []
+        for text in texts:
+            if self.lower:
+                text = text.lower()
+            sequence = []
+            for word in text.translate(self._filters).split(self.split):
+                if not word:
+                    continue
+                index = self.word_index.get(word)
+                if index is not None and not (self.num_words and index >= self.num_words):
+                    sequence.append(index)
+                elif self.oov_index is not None:
+                    sequence.append(self.oov_index)
+            sequences.append(sequence)
+        return sequences
+
+    def encode(self, texts, max_len):
+        """Post-padded and post-truncated int32 sequences of cleaned texts."""
+        return self.vocabulary.encode(texts, max_len)
+
+    def reference_encode(self, texts, max_len):
+        padded = np.zeros((len(texts), max_len), dtype=np.int32)
+        for row, sequence in enumerate(self.texts_to_sequences(texts)):
+            sequence = sequence[:max_len]
+            padded[row, : len(sequence)] = sequence
+        return padded
+
+    def forward(self, padded):
+        x, mask = np.asarray(padded), None
+        for spec, weights in zip(self.layers, self.weights):
+            x, mask = _forward_layer(spec, weights, x, mask)
+        return x
+
+    def predict(self, padded, batch_size):
+        """Positive-class probability for every row."""
+        outputs = [
+            self.forward(padded[start : start + batch_size])[:, 0]
+            for start in range(0, len(padded), batch_size)
+        ]
+        return np.concatenate(outputs) if outputs else np.zeros(0, dtype=np.float32)
+
+
+# Tools
+
+
+def _keras_engine(influence_core):
+    if influence_core.get_engine().name == "keras":
+        return influence_core.get_engine()
+    return influence_core.KerasEngine(
+        influence_core.MODEL_PATH, influence_core.TOKENIZER_PATH
+    )
+
+
+def _sample_texts(influence_core):
+    sentences = [s for s in influence_core.SAMPLE_ARTICLE.split("\n") if s.strip()]
+    return [influence_core.SAMPLE_ARTICLE, "", "markets rallied"] + sentences
+
+
+def export():
+    from model import influence_core
+
+    keras_engine = _keras_engine(influence_core)
+    export_model(
+        keras_engine.model, keras_engine.tokenizer, influence_core.NUMPY_MODEL_PATH
+    )
+
+
+def check_parity(texts=None, tolerance=1e-4):
+    """Compare NumPy and Keras outputs, return the largest probability difference."""
+    from model import influence_core
+
+    keras_engine = _keras_engine(influence_core)
+    numpy_engine = NumpyEngine(influence_core.NUMPY_MODEL_PATH)
+    texts = [influence_core.clean_text(t) for t in texts or _sample_texts(influence_core)]
+
+    keras_input = keras_engine.reference_encode(texts, influence_core.MAX_LEN)
+    numpy_input = numpy_engine.encode(texts, influence_core.MAX_LEN)
+    if not np.array_equal(keras_input, numpy_input):
+        raise AssertionError("Tokenized sequences differ between engines")
+
+    expected = keras_engine.predict(keras_input, influence_core.MAX_BATCH_SIZE)
+    actual = numpy_engine.predict(numpy_input, influence_core.MAX_BATCH_SIZE)
+    difference = float(np.abs(expected - actual).max()) if len(texts) else 0.0
+    print(f"Parity over {len(texts)} texts: max abs difference {difference:.2e}")
+    if difference > tolerance:
+        raise AssertionError(f"Difference {difference} exceeds tolerance {tolerance}")
+    return difference
+
+
+def _benchmark_current(repeats):
+    started = time.perf_counter()
+    from model import influence_core
+
+    influence_core.get_engine()
+    load_seconds = time.perf_counter() - started
+    texts = [influence_core.clean_text(t) for t in _sample_texts(influence_core)]
+    texts = (texts * (influence_core.MAX_BATCH_SIZE // len(texts) + 1))[
+        : influence_core.MAX_BATCH_SIZE
+    ]
+
+    influence_core.predict_price_influence_batch(texts, use_cache=False)
+    started = time.perf_counter()
+    for _ in range(repeats):
+        influence_core.predict_price_influence_batch(texts, use_cache=False)
+    batch_seconds = (time.perf_counter() - started) / repeats
+
+    started = time.perf_counter()
+    for _ in range(repeats):
+        influence_core.predict_price_influence_batch(texts[:1], use_cache=False)
+    single_seconds = (time.perf_counter() - started) / repeats
+
+    print(
+        json.dumps(
+            {
+                "engine": influence_core.get_engine().name,
+                "load_s": round(load_seconds, 3),
+                "single_ms": round(single_seconds * 1000, 3),
+                "batch_size": len(texts),
+                "batch_ms": round(batch_seconds * 1000, 3),
+                "max_rss_mb": round(
+                    resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1
+                ),
+                "tensorflow_loaded": "tensorflow" in sys.modules,
+            }
+        )
+    )
+
+
+def benchmark(repeats=20):
+    """Run each engine in a fresh interpreter so load time and RSS are comparable."""
+    results = []
+    for engine in ("keras", "numpy"):
+        env = dict(os.environ, INFLUENCE_ENGINE=engine)
+        output = subprocess.run(
+            [sys.executable, "-m", "model.numpy_engine", "_bench", str(repeats)],
+            env=env,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    for result in results:
+        print(result)
+    return results
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "parity"
+    if command == "export":
+        export()
+    elif command == "parity":
+        check_parity()
+    elif command == "benchmark":
+        benchmark()
+    elif command == "_bench":
+        _benchmark_current(int(sys.argv[2]))
+    else:
+        print(f"Unknown command: {command}")
+        sys.exit(1)
@@ -1,5 +1,5 @@
 import os
-import time
+import threading
 from datetime import datetime, timedelta
 from pathlib import Path
 
@@ -7,11 +7,11 @@ import joblib
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-import tensorflow as tf
-import yfinance as yf
-from keras.models import load_model
+from loguru import logger
 from sklearn.preprocessing import MinMaxScaler
 
+from market.history_store import history_store
+
 class StockPredictor:
     def __init__(self, model_path=None, scaler_path=None):
         self.base_dir = Path(__file__).parent.parent / "IPSA_MODEL" / "price"
@@ -20,6 +20,9 @@ class StockPredictor:
         self.scaler_path = scaler_path or self.base_dir / "stock_scaler.save"
         self._check_files_exist()
 
+        # Keras is imported here so importing this module stays cheap
+        from keras.models import load_model
+
         self.model = load_model(str(self.model_path))
         self.scaler = joblib.load(str(self.scaler_path))
 
@@ -42,125 +45,100 @@ class StockPredictor:
             )
 
     def predict_future(self, ticker):
-        if not hasattr(self, "scaler") or not isinstance(self.scaler, MinMaxScaler):
-            self.scaler = MinMaxScaler()
-            print("Initialized new MinMaxScaler")
-
-        max_retries = 3
-        retry_delay = 5
-
-        for attempt in range(max_retries):
-            try:
-                data = yf.Ticker(ticker).history('2y')
-
-                print(f"Data shape: {data.shape}")
-                print(f"Data: {data}")
-
-                if data.empty:
-                    raise ValueError(f"No historical data for {ticker}")
-
-                feature_data = data.values
-
-                if not hasattr(self.scaler, "data_min_"):
-                    self.scaler.fit(feature_data)
-                    print(f"Scaler fitted with data for {ticker}")
-
-                scaled_data = self.scaler.transform(feature_data)
-
-                if len(scaled_data) < self.window_size:
-                    raise ValueError(
-                        f"Not enough data points ({len(scaled_data)}) for window_size {self.window_size}"
-                    )
-                
-                current_window = scaled_data[-self.window_size:]
-                
-                predictions = []
-                for _ in range(self.forecast_days):
-                    next_pred = self.model.predict(current_window[np.newaxis, ...])[0][
-                        0
-                    ]
+        # Rate limiting and retries on throttling happen in market.yahoo
+        try:
+            data = history_store.get_history(ticker, period="2y")
+
+            print(f"Data shape: {data.shape}")
+            print(f"Data: {data}")
+
+            if data.empty:
+                raise ValueError(f"No historical data for {ticker}")
+
+            feature_data = data.values
+
+            # The predictor is shared, so a scaler fitted here must not
+            # outlive this call and leak into other tickers
+            scaler = self.scaler
+            if not isinstance(scaler, MinMaxScaler) or not hasattr(
+                scaler, "data_min_"
+            ):
+                scaler = MinMaxScaler().fit(feature_data)
+                print(f"Scaler fitted with data for {ticker}")
 
-                    new_row = np.array(
+            scaled_data = scaler.transform(feature_data)
+
+            if len(scaled_data) < self.window_size:
+                raise ValueError(
+                    f"Not enough data points ({len(scaled_data)}) for window_size {self.window_size}"
+                )
+
+            current_window = scaled_data[-self.window_size:]
+
+            predictions = []
+            for _ in range(self.forecast_days):
+                next_pred = self.model.predict(current_window[np.newaxis, ...])[0][0]
+
+                new_row = np.array(
+                    [
                         [
-                            [
-                                next_pred,
-                                next_pred,
-                                next_pred,
-                                next_pred,
-                                next_pred,
-                                next_pred,
-                                next_pred
-                            ]
+                            next_pred,
+                            next_pred,
+                            next_pred,
+                            next_pred,
+                            next_pred,
+                            next_pred,
+                            next_pred
                         ]
-                    )
+                    ]
+                )
 
-                    current_window = np.concatenate(
-                        [current_window[1:], new_row], axis=0
-                    )
-                    predictions.append(next_pred)
+                current_window = np.concatenate([current_window[1:], new_row], axis=0)
+                predictions.append(next_pred)
 
-                dummy_data = np.zeros((len(predictions),7))
-                dummy_data[:, 0] = predictions
+            dummy_data = np.zeros((len(predictions),7))
+            dummy_data[:, 0] = predictions
 
-                predictions = self.scaler.inverse_transform(dummy_data)[:, 0]
+            predictions = scaler.inverse_transform(dummy_data)[:, 0]
 
-                return predictions
+            return predictions
 
-            except Exception as e:
-                print(
-                    f"Attempt {attempt+1}/{max_retries} failed for {ticker}: {str(e)}"
-                )
-                if attempt < max_retries - 1:
-                    print(f"Waiting {retry_delay} seconds before retry...")
-                    time.sleep(retry_delay)
-                    retry_delay *= 2
-                else:
-                    print(
-                        f"Failed to predict future for {ticker} after {max_retries} attempts"
-                    )
-                    raise
+        except Exception as e:
+            logger.error(f"Failed to predict future for {ticker}: {str(e)}")
+            raise
 
     def analyze(self, ticker):
         try:
-            max_retries = 3
-            for attempt in range(max_retries):
-                try:
-                    predictions = self.predict_future(ticker)
+            predictions = self.predict_future(ticker)
 
-                    data = yf.download(ticker, period="1d")
-                    if data.empty:
-                        return f"Data not found {ticker}"
+            data = history_store.get_history(ticker, period="5d")
+            if data.empty:
+                return f"Data not found {ticker}"
 
-                    current_price = float(data["Open"].iloc[-1])
+            current_price = float(data["Open"].iloc[-1])
 
-                    avg_prediction = np.mean(predictions)
-                    price_change = (avg_prediction - current_price) / current_price
+            avg_prediction = np.mean(predictions)
+            price_change = (avg_prediction - current_price) / current_price
 
-                    message = (
-                        f"📈 {self.forecast_days}-day forecast for {ticker}\n"
-                        f"────────────────────────────\n"
-                        f"💰 Current price: {current_price:.2f}$\n"
-                        f"🔮 Average projected price: {avg_prediction:.2f}$\n"
-                        f"📊 Expected change: {price_change*100:+.2f}% {'📉' if price_change < 0 else '📈'}\n"
-                    )
-
-                    return message, price_change
+            message = (
+                f"📈 {self.forecast_days}-day forecast for {ticker}\n"
+                f"────────────────────────────\n"
+                f"💰 Current price: {current_price:.2f}$\n"
+                f"🔮 Average projected price: {avg_prediction:.2f}$\n"
+                f"📊 Expected change: {price_change*100:+.2f}% {'📉' if price_change < 0 else '📈'}\n"
+            )
 
-                except Exception as e:
-                    if attempt < max_retries - 1:
-                        time.sleep(5 * (attempt + 1))
-                    else:
-                        raise
+            return message, price_change
 
         except Exception as e:
-            print(f"Error in analyze: {str(e)}", exc_info=True)
+            logger.opt(exception=e).error(f"Error in analyze: {e}")
             return "Error in generating the forecast. The API request limit may have been exceeded.."
 
     def predict_plt(self, ticker, user_id):
         predictions = self.predict_future(ticker)
-        history = yf.download(ticker, period="1y")["Open"]
-
-        history_close = yf.download(ticker, period="1y")["Close"]
+        history_data = history_store.get_history(ticker, period="1y")
+        history = history_data["Open"]
+        history_close = history_data["Close"]
 
         plt.figure(figsize=(14, 7))
         plt.plot(history, label="Historical Open Price")
@@ -202,6 +180,35 @@ class StockPredictor:
         return filename
 
 
+_predictor = None
+_predictor_lock = threading.Lock()
+
+
+def get_predictor():
+    """Shared StockPredictor, the model is loaded on first use."""
+    global _predictor
+
+    if _predictor is None:
+        with _predictor_lock:
+            if _predictor is None:
+                _predictor = StockPredictor()
+    return _predictor
+
+
+def is_ready():
+    return _predictor is not None
+
+
+def warm_up():
+    """Load the model and run one dummy forward pass to build the graph."""
+    predictor = get_predictor()
+    shape = [
+        dim if dim is not None else predictor.window_size
+        for dim in predictor.model.input_shape[1:]
+    ]
+    predictor.model.predict(np.zeros([1] + shape), verbose=0)
+
+
 if __name__ == "__main__":
     ticker = "NVDA"
     predictor = StockPredictor()
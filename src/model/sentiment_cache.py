@@ -0,0 +1,125 @@
+import hashlib
+import os
+import sqlite3
+import time
+
+from loguru import logger
+
+from sqlite_store import SQLiteStore
+
+# Read from the environment like the rest of model/, which runs without the bot config
+CACHE_FILE = os.getenv(
+    "SENTIMENT_CACHE_FILE",
+    os.path.join(os.path.expanduser("~"), "IPSA", "sentiment_cache.db"),
+)
+CACHE_SIZE = int(os.getenv("SENTIMENT_CACHE_SIZE", "50000"))
+
+
+def file_digest(*paths):
+    """Fingerprint of model files, used as the model version."""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as handle:
+            for block in iter(lambda: handle.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def sequence_key(sequence):
+    """Key of one padded model input row."""
+    return hashlib.sha1(sequence.tobytes()).hexdigest()
+
+
+class SentimentCache(SQLiteStore):
+    """Model output probabilities by input sequence, in a local SQLite file.
+
+    Entries written by another model version are dropped by bind(), and the
+    least recently used entries are evicted past `max_entries`.
+    """
+
+    schema = (
+        """CREATE TABLE IF NOT EXISTS sentiment (
+        key TEXT PRIMARY KEY,
+        probability REAL NOT NULL,
+        model_version TEXT NOT NULL,
+        used_at REAL NOT NULL)""",
+    )
+
+    def __init__(self, path=CACHE_FILE, max_entries=CACHE_SIZE):
+        super().__init__(path)
+        self.max_entries = max_entries
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+
+    def bind(self, version):
+        """Use entries of `version` only, dropping anything else."""
+        self.version = version
+        try:
+            with self._connect() as conn:
+                removed = conn.execute(
+                    "DELETE FROM sentiment WHERE model_version != ?", (version,)
+                ).rowcount
+            if removed:
+                logger.info(f"Sentiment cache: dropped {removed} entries of other models")
+        except sqlite3.Error as e:
+            logger.error(f"Sentiment cache invalidation failed: {e}")
+
+    def get_many(self, keys):
+        if self.version is None or not keys:
+            return {}
+        keys = list(set(keys))
+        placeholders = ", ".join("?" * len(keys))
+        try:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    f"SELECT key, probability FROM sentiment "
+                    f"WHERE model_version = ? AND key IN ({placeholders})",
+                    [self.version] + keys,
+                ).fetchall()
+                if rows:
+                    conn.execute(
+                        f"UPDATE sentiment SET used_at = ? "
+                        f"WHERE key IN ({', '.join('?' * len(rows))})",
+                        [time.time()] + [key for key, _ in rows],
+                    )
+        except sqlite3.Error as e:
+            logger.error(f"Sentiment cache read failed: {e}")
+            rows = []
+
+        with self._lock:
+            self.hits += len(rows)
+            self.misses += len(keys) - len(rows)
+        return dict(rows)
+
+    def put_many(self, probabilities):
+        if self.version is None or not probabilities:
+            return
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.executemany(
+                    """INSERT INTO sentiment (key, probability, model_version, used_at)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(key) DO UPDATE
+                    SET probability = excluded.probability,
+                    model_version = excluded.model_version, used_at = excluded.used_at""",
+                    [
+                        (key, float(probability), self.version, now)
+                        for key, probability in probabilities.items()
+                    ],
+                )
+                conn.execute(
+                    """DELETE FROM sentiment WHERE key IN (
+                    SELECT key FROM sentiment ORDER BY used_at DESC LIMIT -1 OFFSET ?)""",
+                    (self.max_entries,),
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Sentiment cache write failed: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "version": self.version}
+
+
+sentiment_cache = SentimentCache()
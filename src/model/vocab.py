@@ -0,0 +1,103 @@
+"""Vectorised replacement for Tokenizer.texts_to_sequences + pad_sequences.
+
+Expects text that already went through influence_core.clean_text, so the
+tokenizer's filters and lowercasing are not applied again.
+
+    python -m model.vocab   # check against the current engine and time both
+"""
+
+import sys
+import time
+from itertools import chain, repeat
+
+import numpy as np
+
+
+class CompiledVocabulary:
+    """word_index capped at num_words, with unknown words already resolved.
+
+    Lookups are a single dict.get per word, fed straight into a NumPy array;
+    id 0 (padding, never a word id) marks words to drop.
+    """
+
+    def __init__(self, lookup, oov_index=None):
+        self.lookup = lookup
+        self.oov_index = oov_index
+        self._missing = oov_index if oov_index is not None else 0
+
+    @classmethod
+    def from_word_index(cls, word_index, num_words=None, oov_token=None):
+        oov_index = word_index.get(oov_token) if oov_token is not None else None
+        # Words past num_words behave exactly like unknown ones
+        lookup = {
+            word: index
+            for word, index in word_index.items()
+            if not (num_words and index >= num_words)
+        }
+        return cls(lookup, oov_index)
+
+    def __len__(self):
+        return len(self.lookup)
+
+    def __contains__(self, word):
+        """Whether `word` produces an id in encode output."""
+        return self.oov_index is not None or word in self.lookup
+
+    def encode(self, texts, max_len):
+        """Post-padded, post-truncated int32 matrix of shape (len(texts), max_len)."""
+        padded = np.zeros((len(texts), max_len), dtype=np.int32)
+        tokens = [text.split() for text in texts]
+        lengths = np.fromiter(map(len, tokens), dtype=np.int64, count=len(tokens))
+        total = int(lengths.sum())
+        if not total:
+            return padded
+
+        ids = np.fromiter(
+            map(self.lookup.get, chain.from_iterable(tokens), repeat(self._missing)),
+            dtype=np.int32,
+            count=total,
+        )
+        rows = np.repeat(np.arange(len(texts)), lengths)
+        kept = ids != 0
+        ids, rows = ids[kept], rows[kept]
+
+        # Column of every kept token inside its row
+        counts = np.bincount(rows, minlength=len(texts))
+        starts = np.cumsum(counts) - counts
+        columns = np.arange(len(rows)) - starts[rows]
+        inside = columns < max_len
+        padded[rows[inside], columns[inside]] = ids[inside]
+        return padded
+
+
+def benchmark(engine, texts, max_len, repeats=50):
+    """Time the engine's reference tokenizer against the compiled vocabulary."""
+    expected = engine.reference_encode(texts, max_len)
+    actual = engine.vocabulary.encode(texts, max_len)
+    if not np.array_equal(np.asarray(expected, dtype=np.int32), actual):
+        raise AssertionError("Compiled vocabulary output differs from the tokenizer")
+
+    results = {}
+    for name, encode in (
+        ("reference", engine.reference_encode),
+        ("compiled", engine.vocabulary.encode),
+    ):
+        started = time.perf_counter()
+        for _ in range(repeats):
+            encode(texts, max_len)
+        results[name] = (time.perf_counter() - started) / repeats * 1000
+    print(
+        f"{len(texts)} texts: reference {results['reference']:.3f} ms, "
+        f"compiled {results['compiled']:.3f} ms "
+        f"({results['reference'] / results['compiled']:.1f}x)"
+    )
+    return results
+
+
+if __name__ == "__main__":
+    from model import influence_core
+
+    batch = int(sys.argv[1]) if len(sys.argv) > 1 else influence_core.MAX_BATCH_SIZE
+    sample = influence_core.clean_text(influence_core.SAMPLE_ARTICLE).split()
+    texts = [" ".join(sample[i % len(sample) :]) for i in range(batch)]
+    benchmark(influence_core.get_engine(), texts, influence_core.MAX_LEN)
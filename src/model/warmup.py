@@ -0,0 +1,19 @@
+from loguru import logger
+
+from model import influence_core, price_core
+
+MODELS = {"sentiment": influence_core, "price": price_core}
+
+
+def warm_up_models():
+    """Load every model and run a dummy inference, skipping ones that fail."""
+    for name, module in MODELS.items():
+        try:
+            module.warm_up()
+            logger.info(f"{name.capitalize()} model is ready")
+        except Exception as e:
+            logger.opt(exception=e).error(f"Failed to warm up {name} model: {e}")
+
+
+def models_ready():
+    return {name: module.is_ready() for name, module in MODELS.items()}
@@ -0,0 +1,141 @@
+import hashlib
+import sqlite3
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from config import articles_file, logger
+from sqlite_store import SQLiteStore
+
+TRACKING_PREFIXES = ("utm_",)
+COLUMNS = ("url", "content_hash", "title", "date", "about", "text", "influence")
+
+
+def canonical_url(url):
+    """Url without fragment, tracking parameters or trailing slash, host lowercased."""
+    parts = urlsplit(url.strip())
+    query = [
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(TRACKING_PREFIXES)
+    ]
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit(
+        (parts.scheme.lower(), parts.netloc.lower(), path, urlencode(query), "")
+    )
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ArticleStore(SQLiteStore):
+    """Persistent table of downloaded and classified articles in a local SQLite file.
+
+    Rows are keyed by canonical url. Stored bodies spare a download; the
+    influence is always recomputed, so it follows model changes.
+    """
+
+    schema = (
+        """CREATE TABLE IF NOT EXISTS articles (
+        url TEXT PRIMARY KEY,
+        content_hash TEXT NOT NULL,
+        title TEXT,
+        date TEXT,
+        about TEXT,
+        text TEXT,
+        influence TEXT NOT NULL,
+        stored_at REAL NOT NULL)""",
+        """CREATE TABLE IF NOT EXISTS feed_watermarks (
+        feed TEXT PRIMARY KEY,
+        date TEXT NOT NULL,
+        url TEXT NOT NULL,
+        updated_at REAL NOT NULL)""",
+    )
+
+    def __init__(self, path=articles_file):
+        super().__init__(path)
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, urls):
+        """Stored rows for the given urls as {canonical url: dict}."""
+        keys = list({canonical_url(url) for url in urls})
+        if not keys:
+            return {}
+        try:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    f"SELECT {', '.join(COLUMNS)} FROM articles "
+                    f"WHERE url IN ({', '.join('?' * len(keys))})",
+                    keys,
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"Article store read failed: {e}")
+            rows = []
+
+        found = {row[0]: dict(zip(COLUMNS, row)) for row in rows}
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def save(self, item):
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    """INSERT INTO articles
+                    (url, content_hash, title, date, about, text, influence, stored_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(url) DO UPDATE
+                    SET content_hash = excluded.content_hash, title = excluded.title,
+                    date = excluded.date, about = excluded.about, text = excluded.text,
+                    influence = excluded.influence, stored_at = excluded.stored_at""",
+                    (
+                        canonical_url(item["url"]),
+                        item["content_hash"],
+                        item.get("title"),
+                        item.get("date"),
+                        item.get("about"),
+                        item.get("text"),
+                        item["influence"],
+                        time.time(),
+                    ),
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Article store write failed for {item['url']}: {e}")
+
+    def get_watermarks(self):
+        """{feed url: (date, url)} of the newest article processed per feed."""
+        try:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT feed, date, url FROM feed_watermarks"
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"Article store read failed: {e}")
+            return {}
+        return {feed: (date, url) for feed, date, url in rows}
+
+    def set_watermark(self, feed, date, url):
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    """INSERT INTO feed_watermarks (feed, date, url, updated_at)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(feed) DO UPDATE
+                    SET date = excluded.date, url = excluded.url,
+                    updated_at = excluded.updated_at""",
+                    (feed, date, url, time.time()),
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Watermark write failed for {feed}: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+article_store = ArticleStore()
@@ -0,0 +1,243 @@
+import re
+import threading
+from collections import defaultdict, deque
+
+from config import logger
+from db import db
+
+# Legal suffixes dropped from company names, so "Apple Inc." also matches "Apple"
+NAME_SUFFIXES = re.compile(
+    r"[\s,]+(inc|incorporated|corp|corporation|co|company|ltd|limited|plc|"
+    r"sa|ag|nv|se|group|holdings?)\.?$",
+    re.IGNORECASE,
+)
+MIN_NAME_LENGTH = 3
+# Tickers like "A" or "T" are ordinary words; they only count when written
+# as "$T", "(T)" or "NYSE:T"
+SHORT_TICKER_LENGTH = 2
+SHORT_TICKER_PREFIXES = "$(:"
+
+
+def name_variants(name):
+    """Full company name and the name without legal suffixes."""
+    variants = {name.strip()}
+    short = name.strip()
+    while True:
+        stripped = NAME_SUFFIXES.sub("", short).strip(" ,")
+        if stripped == short:
+            break
+        short = stripped
+    if len(short) >= MIN_NAME_LENGTH:
+        variants.add(short)
+    return {variant for variant in variants if variant}
+
+
+def _fold(text):
+    """Lowercase text, one character per input character so offsets line up."""
+    return "".join(char.lower()[:1] for char in text)
+
+
+class AhoCorasick:
+    """Case-insensitive multi-pattern matcher.
+
+    Patterns can be added at any time; failure links are recomputed lazily
+    on the next search.
+    """
+
+    def __init__(self):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        self._dirty = False
+
+    def add(self, pattern, value):
+        state = 0
+        for char in _fold(pattern):
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            state = next_state
+        self.output[state].append((len(pattern), value))
+        self._dirty = True
+
+    def _build(self):
+        queue = deque(self.goto[0].values())
+        for state in queue:
+            self.fail[state] = 0
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+        self._dirty = False
+
+    def search(self, text):
+        """Yield (start, end, value) for every pattern occurrence in text."""
+        if self._dirty:
+            self._build()
+        state = 0
+        for index, char in enumerate(_fold(text)):
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            match_state = state
+            while match_state:
+                for length, value in self.output[match_state]:
+                    yield index - length + 1, index + 1, value
+                match_state = self.fail[match_state]
+
+
+def _is_boundary(text, start, end):
+    before = text[start - 1] if start > 0 else " "
+    after = text[end] if end < len(text) else " "
+    return not before.isalnum() and not after.isalnum()
+
+
+class EntityIndex:
+    """Tickers and company names of every holding in the stocks table.
+
+    One pass over a text returns every held ticker it mentions together with
+    the users holding it. Tickers match case-sensitively, names ignore case;
+    both only match as whole words.
+
+    Holdings and company names are loaded by a background thread, started
+    by warm_up() and on every new holding, so matching never waits on the
+    database or Yahoo; a ticker whose name is not indexed yet matches by
+    ticker only.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.holders = defaultdict(set)
+        self.automaton = AhoCorasick()
+        self.patterns = set()
+        self._pending = set()
+        self._loaded = False
+        self._refreshing = False
+
+    def load(self):
+        """Read all holdings from the database."""
+        rows = db.get_all_holdings()
+        with self._lock:
+            self.holders.clear()
+            for user_id, ticker in rows:
+                ticker = ticker.strip().upper()
+                self.holders[ticker].add(user_id)
+                self._add_pattern(ticker, ticker, case_sensitive=True)
+            self._pending = set(self.holders)
+            self._loaded = True
+        logger.info(f"Entity index loaded {len(self.holders)} tickers")
+
+    def warm_up(self):
+        """Start loading holdings and names in the background."""
+        self._schedule()
+
+    def _schedule(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(
+            target=self._refresh, name="EntityIndex", daemon=True
+        ).start()
+
+    def _refresh(self):
+        try:
+            while True:
+                with self._lock:
+                    if self._loaded and not self._pending:
+                        self._refreshing = False
+                        return
+                if not self._loaded:
+                    self.load()
+                self._index_pending()
+        except Exception as e:
+            logger.error(f"Entity index refresh failed: {e}")
+            with self._lock:
+                self._refreshing = False
+
+    def add_holding(self, user_id, ticker):
+        ticker = ticker.strip().upper()
+        with self._lock:
+            if ticker not in self.holders:
+                self._pending.add(ticker)
+            self.holders[ticker].add(user_id)
+            self._add_pattern(ticker, ticker, case_sensitive=True)
+        self._schedule()
+
+    def remove_holding(self, user_id, ticker):
+        # Patterns of tickers nobody holds stay in the automaton and are
+        # filtered out at match time
+        with self._lock:
+            users = self.holders.get(ticker.strip().upper())
+            if users is not None:
+                users.discard(user_id)
+
+    def remove_user(self, user_id):
+        with self._lock:
+            for users in self.holders.values():
+                users.discard(user_id)
+
+    def on_holding_change(self, user_id, ticker, held):
+        if ticker is None:
+            self.remove_user(user_id)
+        elif held:
+            self.add_holding(user_id, ticker)
+        else:
+            self.remove_holding(user_id, ticker)
+
+    def _index_pending(self):
+        with self._lock:
+            pending, self._pending = self._pending, set()
+        if not pending:
+            return
+
+        # One rate-limited Ticker.info request per uncached name
+        names = db.get_stock_names(sorted(pending))
+        with self._lock:
+            for ticker in pending:
+                name = names.get(ticker)
+                if name and name not in (ticker, "Name not found"):
+                    for variant in name_variants(name):
+                        self._add_pattern(variant, ticker, case_sensitive=False)
+
+    def _add_pattern(self, pattern, ticker, case_sensitive):
+        key = (pattern if case_sensitive else _fold(pattern), ticker)
+        if key in self.patterns:
+            return
+        self.patterns.add(key)
+        self.automaton.add(pattern, (ticker, pattern if case_sensitive else None))
+
+    def match(self, text):
+        """{ticker: set of user ids} for every indexed held ticker mentioned in text."""
+        if not self._loaded:
+            self._schedule()
+
+        hits = {}
+        with self._lock:
+            for start, end, (ticker, exact) in self.automaton.search(text):
+                if exact is not None and text[start:end] != exact:
+                    continue
+                if not _is_boundary(text, start, end):
+                    continue
+                if (
+                    exact is not None
+                    and len(exact) <= SHORT_TICKER_LENGTH
+                    and (start == 0 or text[start - 1] not in SHORT_TICKER_PREFIXES)
+                ):
+                    continue
+                users = self.holders.get(ticker)
+                if users:
+                    hits[ticker] = set(users)
+        return hits
+
+
+entity_index = EntityIndex()
+db.holding_listeners.append(entity_index.on_holding_change)
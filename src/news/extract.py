@@ -0,0 +1,114 @@
+import re
+from html.parser import HTMLParser
+
+CHUNK_SIZE = 16 * 1024
+NON_LETTERS = re.compile(r"[^a-zA-Z]")
+WHITESPACE = re.compile(r"\s+")
+
+
+def is_body_container(attrs):
+    """Article body element on investing.com pages."""
+    attrs = dict(attrs)
+    classes = attrs.get("class") or ""
+    return (
+        attrs.get("id") == "article"
+        or "WYSIWYG" in classes
+        or "articlePage" in classes
+        or attrs.get("data-test") == "article-body"
+    )
+
+
+class _Done(Exception):
+    pass
+
+
+class BodyTextParser(HTMLParser):
+    """Collects <p> text, optionally only inside the article body container,
+    and stops once `max_tokens` words accepted by `in_vocabulary` were seen."""
+
+    def __init__(self, max_tokens, in_vocabulary, container_only=True):
+        super().__init__(convert_charrefs=True)
+        self.max_tokens = max_tokens
+        self.in_vocabulary = in_vocabulary
+        self.container_only = container_only
+        self.container_tag = None
+        self.container_depth = 0
+        self.found_container = False
+        self.paragraph_depth = 0
+        self.paragraph = []
+        self.kept = []
+        self.tokens = 0
+
+    def _collecting(self):
+        return not self.container_only or self.container_depth > 0
+
+    def handle_starttag(self, tag, attrs):
+        if self.container_depth:
+            if tag == self.container_tag:
+                self.container_depth += 1
+        elif self.container_only and is_body_container(attrs):
+            self.container_tag = tag
+            self.container_depth = 1
+            self.found_container = True
+
+        if tag == "p" and self._collecting():
+            self.paragraph_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag == "p" and self.paragraph_depth:
+            self.paragraph_depth -= 1
+            if not self.paragraph_depth:
+                self._flush_paragraph()
+
+        if self.container_depth and tag == self.container_tag:
+            self.container_depth -= 1
+            if not self.container_depth:
+                # Only the first body container is read
+                raise _Done
+
+    def handle_data(self, data):
+        if self.paragraph_depth:
+            self.paragraph.append(data)
+
+    def _flush_paragraph(self):
+        text = "".join(self.paragraph).strip()
+        self.paragraph = []
+        if not text:
+            return
+
+        # Same word boundaries as influence_core.clean_text
+        words = WHITESPACE.split(text)
+        for index, word in enumerate(words):
+            token = NON_LETTERS.sub("", word).lower()
+            if token and self.in_vocabulary(token):
+                self.tokens += 1
+                if self.tokens >= self.max_tokens:
+                    self.kept.append(" ".join(words[: index + 1]))
+                    raise _Done
+        self.kept.append(text)
+
+    def parse(self, html):
+        try:
+            for start in range(0, len(html), CHUNK_SIZE):
+                self.feed(html[start : start + CHUNK_SIZE])
+            self.close()
+        except _Done:
+            pass
+        if self.paragraph_depth:
+            try:
+                self._flush_paragraph()
+            except _Done:
+                pass
+        return "\n".join(self.kept)
+
+
+def extract_body_text(html, max_tokens, in_vocabulary):
+    """Article body text, cut right after the `max_tokens`-th model token.
+
+    Falls back to every <p> on the page when no body container is found.
+    """
+    parser = BodyTextParser(max_tokens, in_vocabulary)
+    text = parser.parse(html)
+    if parser.found_container:
+        return text
+    return BodyTextParser(max_tokens, in_vocabulary, container_only=False).parse(html)
@@ -0,0 +1,146 @@
+"""News sources and a streaming RSS/Atom reader.
+
+Every source is a feed url with the HTML listing page that replaces it when
+the feed cannot be fetched or parsed.
+"""
+
+import html
+import re
+import xml.etree.ElementTree as ElementTree
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import NamedTuple, Optional
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+ATOM = "{http://www.w3.org/2005/Atom}"
+FEED_ROOTS = ("rss", "feed")
+CHUNK_SIZE = 16 * 1024
+TAG = re.compile(r"<[^>]+>")
+
+
+class FeedSource(NamedTuple):
+    url: str
+    kind: str  # "rss" (RSS or Atom) or "html" (listing page)
+    language: str
+    fallback: Optional[str] = None  # listing page used when the feed is unavailable
+
+
+# (feed file, listing path) of every investing.com news section
+INVESTING_SECTIONS = (
+    ("news.rss", "news/"),
+    ("news_1.rss", "news/forex-news/"),
+    ("news_11.rss", "news/commodities-news/"),
+    ("news_25.rss", "news/stock-market-news/"),
+    ("news_95.rss", "news/economic-indicators/"),
+    ("news_14.rss", "news/economy/"),
+    ("news_301.rss", "news/cryptocurrency-news/"),
+)
+
+SOURCES = [
+    FeedSource(
+        f"https://{host}.investing.com/rss/{feed}",
+        "rss",
+        language,
+        f"https://{host}.investing.com/{listing}",
+    )
+    for host, language in (("ru", "ru"), ("www", "en"))
+    for feed, listing in INVESTING_SECTIONS
+]
+
+
+def normalize_date(value):
+    """Feed date as a UTC "%Y-%m-%d %H:%M:%S" string, like listing pages use."""
+    value = (value or "").strip()
+    if not value:
+        return "date not found"
+    try:
+        return datetime.strptime(value, DATE_FORMAT).strftime(DATE_FORMAT)
+    except ValueError:
+        pass
+    try:
+        parsed = parsedate_to_datetime(value)  # RFC 822, used by RSS
+    except (TypeError, ValueError):
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))  # Atom
+        except ValueError:
+            return "date not found"
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.strftime(DATE_FORMAT)
+
+
+def _local(tag):
+    return tag.rsplit("}", 1)[-1].lower()
+
+
+def _child_text(element, *names):
+    for name in names:
+        child = element.find(name)
+        if child is not None and child.text and child.text.strip():
+            return child.text.strip()
+    return None
+
+
+def _atom_link(entry):
+    links = entry.findall(f"{ATOM}link")
+    for link in links:
+        if link.get("rel", "alternate") == "alternate" and link.get("href"):
+            return link.get("href").strip()
+    return links[0].get("href", "").strip() if links else None
+
+
+def _plain(text):
+    # Descriptions usually carry escaped HTML
+    return html.unescape(TAG.sub("", html.unescape(text))).strip()
+
+
+def _feed_item(element):
+    if element.tag == f"{ATOM}entry":
+        url = _atom_link(element)
+        date = _child_text(element, f"{ATOM}published", f"{ATOM}updated")
+        title = _child_text(element, f"{ATOM}title")
+        about = _child_text(element, f"{ATOM}summary", f"{ATOM}content")
+    else:
+        url = _child_text(element, "link", "guid")
+        date = _child_text(element, "pubDate", "{http://purl.org/dc/elements/1.1/}date")
+        title = _child_text(element, "title")
+        about = _child_text(element, "description")
+    about = _plain(about) if about else ""
+    return {
+        "title": _plain(title) if title else "title not found",
+        "date": normalize_date(date),
+        "url": url or "link not found",
+        "about": about or "about not found",
+    }
+
+
+def parse_feed(body, is_new=None):
+    """Items of an RSS or Atom document, in document order.
+
+    The document is parsed incrementally and every item is discarded as soon
+    as it is read. Only items for which `is_new(item)` holds are kept.
+    Returns None when the body is not a well-formed feed.
+    """
+    parser = ElementTree.XMLPullParser(events=("start", "end"))
+    items = []
+    root_checked = False
+    try:
+        for offset in range(0, len(body), CHUNK_SIZE):
+            parser.feed(body[offset : offset + CHUNK_SIZE])
+            for event, element in parser.read_events():
+                if event == "start":
+                    if not root_checked:
+                        if _local(element.tag) not in FEED_ROOTS:
+                            return None
+                        root_checked = True
+                    continue
+                if element.tag not in ("item", f"{ATOM}entry"):
+                    continue
+                item = _feed_item(element)
+                element.clear()
+                if is_new is None or is_new(item):
+                    items.append(item)
+        parser.close()
+    except ElementTree.ParseError:
+        return None
+    return items if root_checked else None
@@ -0,0 +1,108 @@
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from user_agent import generate_user_agent
+
+from config import NEWS_FETCH_PER_HOST, NEWS_FETCH_TIMEOUT, NEWS_FETCH_WORKERS, logger
+from market.providers import get_provider
+from news.http_cache import http_cache
+
+
+class FetchEngine:
+    """Concurrent page fetcher with one keep-alive session per host.
+
+    At most `per_host` requests run against the same host at a time and
+    `max_workers` overall; every request gets `timeout` seconds.
+    """
+
+    def __init__(
+        self,
+        max_workers=NEWS_FETCH_WORKERS,
+        per_host=NEWS_FETCH_PER_HOST,
+        timeout=NEWS_FETCH_TIMEOUT,
+    ):
+        self.per_host = per_host
+        self.timeout = timeout
+        self._sessions = {}
+        self._host_slots = defaultdict(lambda: threading.BoundedSemaphore(per_host))
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="NewsFetch"
+        )
+        self.requests = 0
+        self.failures = 0
+
+    def _session(self, host):
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=1, pool_maxsize=self.per_host, max_retries=1
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.headers["User-Agent"] = generate_user_agent()
+                self._sessions[host] = session
+            return session, self._host_slots[host]
+
+    def fetch(self, url, headers=None):
+        """GET a page, raising requests exceptions on failure."""
+        host = urlsplit(url).netloc
+        session, slots = self._session(host)
+        with slots:
+            with self._lock:
+                self.requests += 1
+            response = get_provider().fetch_page(
+                url,
+                headers={**session.headers, **(headers or {})},
+                timeout=self.timeout,
+                session=session,
+            )
+        response.raise_for_status()
+        return response
+
+    def fetch_text(self, url, conditional=False, validators=None):
+        """Page body, or None if the request failed.
+
+        With `conditional`, the request is revalidated against the HTTP cache
+        and UNCHANGED is returned when the page is the same as last time. The
+        new validators of the page are put into the `validators` dict, to be
+        passed to http_cache.commit() once the page has been processed.
+        """
+        try:
+            if not conditional:
+                return self.fetch(url).text
+            response = self.fetch(url, http_cache.request_headers(url))
+            body, entry = http_cache.check(url, response)
+            if entry is not None and validators is not None:
+                validators[url] = entry
+            return body
+        except requests.exceptions.RequestException as e:
+            with self._lock:
+                self.failures += 1
+            logger.error(f"Error fetching {url}: {e}")
+            return None
+
+    def fetch_many(self, urls, conditional=False, validators=None):
+        """Fetch pages concurrently, returns {url: body, UNCHANGED or None}."""
+        unique = list(dict.fromkeys(urls))
+        bodies = self._executor.map(
+            lambda url: self.fetch_text(url, conditional, validators), unique
+        )
+        return dict(zip(unique, bodies))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "failures": self.failures,
+                "sessions": len(self._sessions),
+            }
+
+
+fetch_engine = FetchEngine()
@@ -0,0 +1,140 @@
+import hashlib
+import sqlite3
+import time
+
+from config import http_cache_file, logger
+from sqlite_store import SQLiteStore
+
+# Returned instead of a body when a page did not change since the last fetch
+UNCHANGED = object()
+
+
+def body_hash(body):
+    return hashlib.sha1(body.encode("utf-8")).hexdigest()
+
+
+class HttpCache(SQLiteStore):
+    """ETag/Last-Modified validators and body hashes per url, in a local SQLite file."""
+
+    schema = (
+        """CREATE TABLE IF NOT EXISTS http_cache (
+        url TEXT PRIMARY KEY,
+        etag TEXT,
+        last_modified TEXT,
+        body_hash TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        fetched_at REAL NOT NULL)""",
+    )
+
+    def __init__(self, path=http_cache_file):
+        super().__init__(path)
+        self._entries = None
+        self.not_modified = 0
+        self.parse_skipped = 0
+        self.bytes_saved = 0
+
+    def _load(self):
+        if self._entries is not None:
+            return
+        try:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT url, etag, last_modified, body_hash, size FROM http_cache"
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"HTTP cache read failed: {e}")
+            rows = []
+        self._entries = {
+            url: {"etag": etag, "last_modified": modified, "hash": digest, "size": size}
+            for url, etag, modified, digest, size in rows
+        }
+
+    def request_headers(self, url):
+        """Conditional request headers for url."""
+        with self._lock:
+            self._load()
+            entry = self._entries.get(url)
+        headers = {}
+        if entry:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def check(self, url, response):
+        """(body, validators) of a conditional response.
+
+        The body is UNCHANGED on a 304 or a body identical to the last
+        committed one. The validators are only remembered once passed to
+        commit(), so a page whose processing failed is fetched and parsed
+        again next time.
+        """
+        with self._lock:
+            self._load()
+            entry = self._entries.get(url)
+
+        if response.status_code == 304 and entry is not None:
+            with self._lock:
+                self.not_modified += 1
+                self.parse_skipped += 1
+                self.bytes_saved += entry["size"]
+            return UNCHANGED, None
+
+        body = response.text
+        digest = body_hash(body)
+        validators = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "hash": digest,
+            "size": len(response.content),
+        }
+        if entry is not None and entry["hash"] == digest:
+            with self._lock:
+                self.parse_skipped += 1
+            return UNCHANGED, validators
+        return body, validators
+
+    def commit(self, validators):
+        """Remember {url: validators} returned by check() for processed pages."""
+        if not validators:
+            return
+        with self._lock:
+            self._load()
+            self._entries.update(validators)
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.executemany(
+                    """INSERT INTO http_cache
+                    (url, etag, last_modified, body_hash, size, fetched_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(url) DO UPDATE
+                    SET etag = excluded.etag, last_modified = excluded.last_modified,
+                    body_hash = excluded.body_hash, size = excluded.size,
+                    fetched_at = excluded.fetched_at""",
+                    [
+                        (
+                            url,
+                            entry["etag"],
+                            entry["last_modified"],
+                            entry["hash"],
+                            entry["size"],
+                            now,
+                        )
+                        for url, entry in validators.items()
+                    ],
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"HTTP cache write failed: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "not_modified": self.not_modified,
+                "parse_skipped": self.parse_skipped,
+                "bytes_saved": self.bytes_saved,
+            }
+
+
+http_cache = HttpCache()
@@ -0,0 +1,137 @@
+"""Targeted HTML extraction for investing.com listing pages.
+
+Only the `article[data-test=article-item]` blocks are turned into a tree;
+article bodies are read by news.extract without building one at all.
+
+    python -m news.listing [fixture dir]   # compare with full html.parser trees
+"""
+
+import glob
+import os
+import sys
+import time
+
+import bs4
+
+from news.extract import extract_body_text
+
+try:
+    import lxml  # noqa: F401
+
+    FAST_PARSER = "lxml"
+except ImportError:
+    FAST_PARSER = "html.parser"
+
+FULL_PARSER = "html.parser"
+LISTING_ITEM = {"data-test": "article-item"}
+LISTING_STRAINER = bs4.SoupStrainer("article", attrs=LISTING_ITEM)
+
+
+def extract_item(article):
+    """Listing entry as a dict from one article-item element."""
+    title_tag = article.find("a", {"data-test": "article-title-link"})
+    date_tag = article.find("time", {"data-test": "article-publish-date"})
+    about_tag = article.find("p", {"data-test": "article-description"})
+    return {
+        "title": title_tag.text.strip() if title_tag else "title not found",
+        "date": date_tag["datetime"].strip() if date_tag else "date not found",
+        "url": title_tag["href"].strip() if title_tag else "link not found",
+        "about": about_tag.text.strip() if about_tag else "about not found",
+    }
+
+
+def listing_articles(html):
+    """article-item elements of a listing page, in page order."""
+    soup = bs4.BeautifulSoup(html, FAST_PARSER, parse_only=LISTING_STRAINER)
+    return soup.find_all("article", LISTING_ITEM)
+
+
+def _fast_listing(html):
+    return [extract_item(a) for a in listing_articles(html)]
+
+
+def _is_listing(html):
+    return 'data-test="article-item"' in html
+
+
+def _full_page(html):
+    # What the bot did before: a full html.parser tree for every page
+    soup = bs4.BeautifulSoup(html, FULL_PARSER)
+    if _is_listing(html):
+        return [extract_item(a) for a in soup.find_all("article", LISTING_ITEM)]
+    return "\n".join(p.text for p in soup.find_all("p") if p.text)
+
+
+def _fast_page(html, max_tokens, in_vocabulary):
+    if _is_listing(html):
+        return _fast_listing(html)
+    return extract_body_text(html, max_tokens, in_vocabulary)
+
+
+def _vocabulary():
+    from model.influence_core import MAX_LEN, get_vocabulary
+
+    try:
+        vocabulary = get_vocabulary()
+        return MAX_LEN, vocabulary.__contains__
+    except Exception as e:
+        print(f"No model vocabulary ({e}), counting every word as a token")
+        return MAX_LEN, lambda word: True
+
+
+def benchmark(directory, repeats=5):
+    """Check the production path against full trees on every fixture page and time both.
+
+    Listing pages must give the same entries; on article pages every line
+    of the extracted body must appear in the text of the page's <p> elements.
+    """
+    paths = sorted(glob.glob(os.path.join(directory, "*.html")))
+    pages = []
+    for path in paths:
+        with open(path, encoding="utf-8") as handle:
+            pages.append(handle.read())
+    if not pages:
+        print(f"No fixtures in {directory}")
+        return None
+
+    max_tokens, in_vocabulary = _vocabulary()
+    mismatches = 0
+    for path, html in zip(paths, pages):
+        full = _full_page(html)
+        fast = _fast_page(html, max_tokens, in_vocabulary)
+        if _is_listing(html):
+            same = full == fast
+        else:
+            same = all(line in full for line in fast.split("\n"))
+        if not same:
+            mismatches += 1
+            print(f"Output differs for {os.path.basename(path)}")
+
+    results = {}
+    for name, parse in (
+        ("full", _full_page),
+        ("fast", lambda html: _fast_page(html, max_tokens, in_vocabulary)),
+    ):
+        started = time.perf_counter()
+        for _ in range(repeats):
+            for html in pages:
+                parse(html)
+        results[name] = (time.perf_counter() - started) / repeats * 1000
+
+    size = sum(len(html) for html in pages) / 1024
+    print(
+        f"{len(pages)} pages ({size:.0f} KB), parser {FAST_PARSER}: "
+        f"full {results['full']:.1f} ms, fast {results['fast']:.1f} ms "
+        f"({results['full'] / results['fast']:.1f}x), {mismatches} mismatches"
+    )
+    return results
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        fixtures = sys.argv[1]
+    else:
+        from config import REPLAY_DIR
+
+        fixtures = os.path.join(REPLAY_DIR, "pages")
+    benchmark(fixtures)
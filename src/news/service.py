@@ -0,0 +1,167 @@
+import asyncio
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import pytz
+
+from config import NEWS_MAX_AGE, NEWS_POLL_INTERVAL, logger
+from db import db
+from func import notify_user
+from market import async_client
+from news.article_store import article_store
+from news.fetcher import fetch_engine
+from news.http_cache import http_cache
+from parsing import NewsParser
+
+SEEN_LIMIT = 5000
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class NewsService:
+    """Polls every feed once per tick and fans new articles out to subscribers.
+
+    Scraping and sentiment inference are done once per article, no matter how
+    many users are subscribed.
+    """
+
+    def __init__(
+        self, parser=None, interval=NEWS_POLL_INTERVAL, max_age=NEWS_MAX_AGE
+    ):
+        self.parser = parser or NewsParser()
+        self.interval = interval
+        self.max_age = timedelta(seconds=max_age)
+        self.subscribers = set()
+        self._seen = OrderedDict()
+        self.watermarks = None
+        self._task = None
+        self.articles_processed = 0
+        self.messages_sent = 0
+
+    def subscribe(self, user_id):
+        self.subscribers.add(user_id)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+            logger.info("Started news service")
+
+    def unsubscribe(self, user_id):
+        self.subscribers.discard(user_id)
+
+    def _is_new(self, item):
+        if item["url"] in self._seen:
+            return False
+        try:
+            published = datetime.strptime(item["date"], DATE_FORMAT)
+        except ValueError:
+            return False
+        # Listing dates are UTC
+        return datetime.utcnow() - published <= self.max_age
+
+    @staticmethod
+    def _newest(items):
+        dated = []
+        for item in items:
+            try:
+                datetime.strptime(item["date"], DATE_FORMAT)
+            except ValueError:
+                continue
+            dated.append((item["date"], item["url"]))
+        return max(dated) if dated else None
+
+    def _mark_seen(self, item):
+        self._seen[item["url"]] = True
+        while len(self._seen) > SEEN_LIMIT:
+            self._seen.popitem(last=False)
+
+    @staticmethod
+    def _get_timezone(user_id):
+        timezone_info = db.get_city_from_db(user_id)
+        if isinstance(timezone_info, tuple):
+            timezone_info = timezone_info[0]
+        try:
+            pytz.timezone(timezone_info)
+        except pytz.UnknownTimeZoneError:
+            logger.warning(
+                f"Unknown timezone {timezone_info!r} of {user_id}, using UTC"
+            )
+            return "UTC"
+        return timezone_info
+
+    async def _deliver(self, item, timezones):
+        for user_id in list(self.subscribers):
+            try:
+                if user_id not in timezones:
+                    timezones[user_id] = await asyncio.to_thread(
+                        self._get_timezone, user_id
+                    )
+                message = self.parser.render_article(
+                    item, timezones[user_id], user_id
+                )
+                await notify_user(user_id, message)
+                self.messages_sent += 1
+            except Exception as e:
+                logger.error(f"Error delivering {item['url']} to {user_id}: {e}")
+
+    async def poll_once(self):
+        timezones = {}
+        if self.watermarks is None:
+            self.watermarks = await asyncio.to_thread(article_store.get_watermarks)
+
+        logger.info(f"Polling {len(self.parser.sources)} feeds")
+        # Parsing of each listing stops at that feed's watermark
+        validators = {}
+        listings = await async_client.run(
+            self.parser.fetch_listings,
+            self.parser.sources,
+            dict(self.watermarks),
+            conditional=True,
+            validators=validators,
+        )
+
+        fresh = {}
+        advanced = {}
+        for feed, items in listings.items():
+            newest = self._newest(items)
+            if newest is not None:
+                advanced[feed] = newest
+            for item in items:
+                if item["url"] not in fresh and self._is_new(item):
+                    fresh[item["url"]] = item
+
+        if fresh:
+            fresh = list(fresh.values())
+            pending = await async_client.run(self.parser.load_known, fresh)
+            if pending:
+                await async_client.run(self.parser.fetch_texts, pending)
+            await async_client.run_compute(self.parser.classify_articles, fresh)
+            await async_client.run(self.parser.tag_mentions, fresh)
+            for item in fresh:
+                self.articles_processed += 1
+                if self.subscribers:
+                    await self._deliver(item, timezones)
+                self._mark_seen(item)
+
+        # Only after delivery, so a failed poll is retried from the same place
+        for feed, (date, url) in advanced.items():
+            self.watermarks[feed] = (date, url)
+            await asyncio.to_thread(article_store.set_watermark, feed, date, url)
+        await asyncio.to_thread(http_cache.commit, validators)
+
+    def stats(self):
+        return {
+            "articles_processed": self.articles_processed,
+            "messages_sent": self.messages_sent,
+            "fetch": fetch_engine.stats(),
+            "http_cache": http_cache.stats(),
+        }
+
+    async def run(self):
+        while True:
+            try:
+                await self.poll_once()
+            except Exception as e:
+                logger.error(f"Error in news service: {e}")
+            logger.info("Sleeping...")
+            await asyncio.sleep(self.interval)
+
+
+news_service = NewsService()
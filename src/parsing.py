@@ -1,125 +1,45 @@
-import asyncio
-import re
-import time
+import math
 from datetime import datetime, timedelta
 
-import bs4
-import requests
-from user_agent import generate_user_agent
-
-from config import app, logger
+from config import NEWS_CRAWL_MAX_PAGES, logger
 from db import db
-from func import (
-    convert_to_utc,
-    get_time_difference,
-    is_within_period,
-    notify_user,
-    parse_time_period,
-    to_local,
-)
-from model.influence_core import predict_price_influence
-
-HTML_PARSER = "html.parser"
+from func import is_within_period, period_cutoff, to_local
+from model.influence_core import MAX_LEN, in_vocabulary
+from model.language import language_router
+from news.article_store import article_store, canonical_url, content_hash
+from news.entity_index import entity_index
+from news.extract import extract_body_text
+from news.feeds import DATE_FORMAT, SOURCES, parse_feed
+from news.fetcher import fetch_engine
+from news.http_cache import UNCHANGED
+from news.listing import extract_item, listing_articles
 
 class NewsParser:
     def __init__(self) -> None:
-        self.links = [
-            "https://ru.investing.com/news/",
-            "https://ru.investing.com/news/forex-news/",
-            "https://ru.investing.com/news/commodities-news/",
-            "https://ru.investing.com/news/stock-market-news/",
-            "https://ru.investing.com/news/economic-indicators/",
-            "https://ru.investing.com/news/economy/",
-            "https://ru.investing.com/news/cryptocurrency-news/",
-            "https://ru.investing.com/news/economic-indicators/",
-            "https://www.investing.com/news/",
-            "https://www.investing.com/news/forex-news/",
-            "https://www.investing.com/news/commodities-news/",
-            "https://www.investing.com/news/stock-market-news/",
-            "https://www.investing.com/news/economic-indicators/",
-            "https://www.investing.com/news/economy/",
-            "https://www.investing.com/news/cryptocurrency-news/",
-            "https://www.investing.com/news/economic-indicators/",
-        ]
-
-    def _parse_title_and_date(self, soup):
-        title_element = soup.find("h1")
-        if title_element:
-            title = title_element.text.strip()
-            logger.info(f"Title: {title}")
-        else:
-            logger.warning("Title element not found.")
-            title = ""
-        date_element = soup.find("time")
-        if date_element:
-            date = date_element.text.strip()
-            logger.info(f"Date: {date}")
-        else:
-            logger.warning("Date element not found.")
-            date = ""
-        return title, date
-
-    def _get_tickers_and_names(self, stocks_info):
-        tickers = [stock["ticker"] for stock in stocks_info]
-        company_names = [stock["name"] for stock in stocks_info]
-        return tickers, company_names
-
-    def _check_mentions(self, article_text, tickers, company_names):
-        mentions = {ticker: False for ticker in tickers}
-        mentions.update({name: False for name in company_names})
-        for ticker in tickers:
-            if ticker in article_text:
-                mentions[ticker] = True
-        for name in company_names:
-            if name in article_text:
-                mentions[name] = True
-        return mentions
-
-    def is_stocks_in_news(self, url, user_id):
-        headers = {"User-Agent": generate_user_agent()}
-        logger.debug(f"Generate user agent: {headers}")
-        try:
-            stocks_info = db.process_stocks(user_id)
-            tickers, company_names = self._get_tickers_and_names(stocks_info)
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            html = response.text
-            soup = bs4.BeautifulSoup(html, HTML_PARSER)
-            title, date = self._parse_title_and_date(soup)
-            paragraphs = soup.find_all("p")
-            article_text = "\n".join([para.text for para in paragraphs if para.text])
-            mentions = self._check_mentions(article_text, tickers, company_names)
-            for entity, is_mentioned in mentions.items():
-                if is_mentioned:
-                    logger.info(f"Mention found: {entity}")
-                    return True
-                else:
-                    logger.info(f"Not found: {entity}")
-        except Exception as e:
-            logger.error(e)
-            return False
-        return False
-
-    def get_news_text(self, url):
-        headers = {"User-Agent": generate_user_agent()}
-        logger.debug(f"Generate user agent: {headers}")
+        self.sources = list(SOURCES)
 
-        try:
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
+    def _extract_text(self, html):
+        """Article body, truncated to what the sentiment model reads."""
+        return extract_body_text(html, MAX_LEN, in_vocabulary)
 
-            html = response.text
-            soup = bs4.BeautifulSoup(html, HTML_PARSER)
+    def find_mentions(self, text):
+        """{ticker: user ids} for every held stock the text mentions."""
+        return entity_index.match(text)
 
-            paragraphs = soup.find_all("p")
-            article_text = "\n".join([para.text for para in paragraphs if para.text])
+    def tag_mentions(self, items):
+        """Attach the held stocks each article mentions as item["mentions"]."""
+        for item in items:
+            item["mentions"] = self.find_mentions(
+                f"{item['title']}\n{item['about']}\n{item.get('text', '')}"
+            )
+        return items
 
-            logger.debug(article_text)
-            return article_text
-
-        except Exception as e:
-            logger.error(e)
-            return ""
+    def get_news_texts(self, urls):
+        """Article bodies for several urls, downloaded concurrently."""
+        pages = fetch_engine.fetch_many(urls)
+        return {
+            url: self._extract_text(html) if html else "" for url, html in pages.items()
+        }
 
     def _get_timezone(self, user_id):
         timezone_info = db.get_city_from_db(user_id)
@@ -127,81 +47,280 @@ class NewsParser:
             return timezone_info[0]
         return timezone_info
 
-    def _parse_article(self, article, seen_articles, period, user_id, timezone):
-        try:
-            title_tag = article.find("a", {"data-test": "article-title-link"})
-            title = title_tag.text.strip() if title_tag else "title not found"
-            date_tag = article.find("time", {"data-test": "article-publish-date"})
-            date = date_tag["datetime"].strip() if date_tag else "date not found"
-            article_url = title_tag["href"].strip() if title_tag else "link not found"
-            about_tag = article.find("p", {"data-test": "article-description"})
-            about = about_tag.text.strip() if about_tag else "about not found"
-            logger.debug(f"Parsing {article_url} - {title}")
-            unique_identifier = (title, article_url)
-            if unique_identifier in seen_articles:
-                return None
-            if not is_within_period(date, period, user_id):
-                return None
-            seen_articles.add(unique_identifier)
-            text = self.get_news_text(article_url)
-            influence = predict_price_influence(text)
-            result_string = f"\n\n🔥 **{title}**\n────────────────────────────\n✨ {influence}\n\n🌊 **{about}**\n────────────────────────────\n__{article_url}__\n\n📆 __{to_local(timezone, date)}__"
-            logger.debug(f"Adding {article_url} - {title} to results")
-            return result_string
-        except Exception as e:
-            logger.error(f"Error processing article: {e}")
-            return None
-
-    def parse_investing_news(self, url, period, user_id):
-        """Investing.com parser."""
-        headers = {"User-Agent": generate_user_agent()}
-        logger.debug(f"Generate user agent: {headers}")
-        try:
-            timezone = self._get_timezone(user_id)
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            html = response.text
-            soup = bs4.BeautifulSoup(html, HTML_PARSER)
-            articles = soup.findAll("article", {"data-test": "article-item"})
-            results = []
-            seen_articles = set()
-            for article in articles:
-                result = self._parse_article(article, seen_articles, period, user_id, timezone)
-                if result:
-                    results.append(result)
-            return results
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Error fetching news: {e}")
-            return []
-
-    def start_parsing(self, period, user_id):
-        results = []
-
-        for link in self.links:
-            logger.info(f"Parsing: {link}")
-            logger.debug(period)
-            results += self.parse_investing_news(link, period, user_id)
-
-        return results
-
-    async def check_new_articles(self, user_id):
-        seen_articles = set()
+    def _extract_article(self, article):
+        return extract_item(article)
+
+    def render_article(self, item, timezone, user_id=None):
+        message = f"\n\n🔥 **{item['title']}**\n────────────────────────────\n✨ {item['influence']}\n\n🌊 **{item['about']}**\n────────────────────────────\n__{item['url']}__\n\n📆 __{to_local(timezone, item['date'])}__"
+        tickers = sorted(
+            ticker
+            for ticker, users in item.get("mentions", {}).items()
+            if user_id in users
+        )
+        if tickers:
+            message += f"\n\n💼 **Your stocks:** {', '.join(tickers)}"
+        return message
+
+    def load_known(self, items):
+        """Fill bodies already in the article store, return the items to download."""
+        known = article_store.get_many([item["url"] for item in items])
+        pending = []
+        for item in items:
+            row = known.get(canonical_url(item["url"]))
+            if row is None:
+                pending.append(item)
+            else:
+                item["text"] = row["text"]
+                item["stored_influence"] = row["influence"]
+        return pending
+
+    def fetch_texts(self, items):
+        texts = self.get_news_texts([item["url"] for item in items])
+        for item in items:
+            item["text"] = texts.get(item["url"], "")
+        return items
+
+    def classify_articles(self, items):
+        """Attach price influence to every item, classified in one batch.
+
+        Bodies the current model has already seen, including reposts under
+        another url, are answered by the sentiment cache, which is dropped
+        whenever the model changes.
+        """
+        texts = {}
+        for item in items:
+            item["content_hash"] = content_hash(item["text"])
+            texts[item["content_hash"]] = item["text"]
+        influences = dict(
+            zip(texts, language_router.classify(list(texts.values())))
+        )
+
+        for item in items:
+            item["influence"] = influences[item["content_hash"]]
+            # Failed downloads are retried on the next request
+            if item["text"] and item.get("stored_influence") != item["influence"]:
+                article_store.save(item)
+        return items
+
+    @staticmethod
+    def _reached_watermark(item, watermark):
+        if watermark is None:
+            return False
+        date, url = watermark
+        # Listing dates are "%Y-%m-%d %H:%M:%S", so they sort as strings
+        return item["date"] < date or (item["date"] == date and item["url"] == url)
+
+    def _parse_listing(self, html, watermark=None):
+        """Listing entries, newest first, stopping at the `watermark` (date, url)."""
+        items = []
+        for article in listing_articles(html):
+            try:
+                item = self._extract_article(article)
+            except Exception as e:
+                logger.error(f"Error processing article: {e}")
+                continue
+            if self._reached_watermark(item, watermark):
+                break
+            items.append(item)
+        return items
+
+    def fetch_listing(self, url, watermark=None):
+        """Listing page entries as dicts, without article bodies."""
+        html = fetch_engine.fetch_text(url)
+        return self._parse_listing(html, watermark) if html else []
 
-        while True:
-            for link in self.links:
-                logger.info("Parsing: " + link)
-                articles = self.parse_investing_news(link, "2 minutes", user_id)
-                for article in articles:
-                    if article not in seen_articles:
-                        await notify_user(user_id, article)
+    def _parse_feed(self, body, watermark=None):
+        """Feed entries newer than the `watermark` (date, url), or None if not a feed."""
+        return parse_feed(
+            body, lambda item: not self._reached_watermark(item, watermark)
+        )
 
-                        logger.debug(f"Added to seen articles: {article}")
-                        seen_articles.add(article)
+    def fetch_listings(
+        self, sources, watermarks=None, conditional=False, validators=None
+    ):
+        """Entries of several sources keyed by source url, downloaded concurrently.
 
-            logger.info("Sleeping...")
-            await asyncio.sleep(120)
+        `watermarks` maps a source url to the (date, url) of the newest article
+        already processed; older entries are dropped. A feed that cannot be
+        fetched or parsed is replaced by its fallback listing page. With
+        `conditional`, bodies unchanged since the last committed fetch are not
+        parsed at all and yield no entries; the new HTTP validators are
+        collected in `validators` for http_cache.commit().
+        """
+        return self._fetch_sources(sources, watermarks, conditional, validators)[0]
 
+    def _fetch_sources(
+        self, sources, watermarks=None, conditional=False, validators=None
+    ):
+        """fetch_listings, plus the set of source urls read from a listing page."""
+        watermarks = watermarks or {}
+        bodies = fetch_engine.fetch_many(
+            [source.url for source in sources], conditional, validators
+        )
+        listings = {}
+        paged = set()
+        fallbacks = {}
+        for source in sources:
+            body = bodies.get(source.url)
+            # Watermarks used to be keyed by the listing page
+            watermark = watermarks.get(source.url) or watermarks.get(source.fallback)
+            if body is UNCHANGED:
+                listings[source.url] = []
+            elif source.kind == "html":
+                listings[source.url] = (
+                    self._parse_listing(body, watermark) if body else []
+                )
+                if body:
+                    paged.add(source.url)
+            else:
+                items = self._parse_feed(body, watermark) if body else None
+                if items is None and validators is not None:
+                    # A body that is not a feed must not be reported as
+                    # unchanged later, or its fallback would stop being read
+                    validators.pop(source.url, None)
+                if items is None and source.fallback:
+                    logger.warning(f"No feed at {source.url}, using {source.fallback}")
+                    fallbacks[source] = watermark
+                listings[source.url] = items or []
+
+        if fallbacks:
+            pages = fetch_engine.fetch_many(
+                [source.fallback for source in fallbacks], conditional, validators
+            )
+            for source, watermark in fallbacks.items():
+                html = pages.get(source.fallback)
+                if html and html is not UNCHANGED:
+                    listings[source.url] = self._parse_listing(html, watermark)
+                    paged.add(source.url)
+        return listings, paged
+
+    @staticmethod
+    def _page_url(listing, page):
+        return listing if page == 1 else f"{listing.rstrip('/')}/{page}"
+
+    @staticmethod
+    def _item_dates(items):
+        dates = []
+        for item in items:
+            try:
+                dates.append(datetime.strptime(item["date"], DATE_FORMAT))
+            except ValueError:
+                continue
+        return dates
+
+    def _crossed(self, items, cutoff):
+        dates = self._item_dates(items)
+        return bool(dates) and min(dates) < cutoff
+
+    def _pages_needed(self, items, cutoff, pages):
+        """Pages still needed to reach `cutoff`, at the pace `pages` pages covered so far."""
+        dates = self._item_dates(items)
+        if not pages or len(dates) < 2:
+            return 1
+        per_page = (max(dates) - min(dates)) / pages
+        if per_page <= timedelta(0):
+            return 1
+        return max(1, math.ceil((min(dates) - cutoff) / per_page))
+
+    def crawl_listings(self, sources, cutoff, max_pages=NEWS_CRAWL_MAX_PAGES):
+        """Entries of every source back to the UTC datetime `cutoff`.
+
+        Sources whose feed or first page does not reach the cutoff continue
+        through numbered listing pages, at most `max_pages` per source. Each
+        round fetches the pages of all unfinished sources concurrently, as
+        many per source as the pace of its pages so far suggests, and a source
+        finishes at the first page older than the cutoff or an empty page.
+        """
+        listings, paged = self._fetch_sources(sources)
+        crawls = {}
+        for source in sources:
+            listing = source.url if source.kind == "html" else source.fallback
+            if not listing or self._crossed(listings[source.url], cutoff):
+                continue
+            # Feed items say nothing about how much time a listing page
+            # covers, so the pace is measured on listing pages only
+            if source.url in paged:
+                crawl = {"page": 2, "read": 1, "items": list(listings[source.url])}
+            else:
+                crawl = {"page": 1, "read": 0, "items": []}
+            crawl["listing"] = listing
+            crawls[source.url] = crawl
+
+        fetched = 0
+        while crawls:
+            page_urls = {}
+            for feed, crawl in crawls.items():
+                count = min(
+                    self._pages_needed(crawl["items"], cutoff, crawl["read"]),
+                    max_pages - crawl["page"] + 1,
+                )
+                page_urls[feed] = [
+                    self._page_url(crawl["listing"], crawl["page"] + offset)
+                    for offset in range(count)
+                ]
+            urls = [url for feed_urls in page_urls.values() for url in feed_urls]
+            pages = fetch_engine.fetch_many(urls)
+            fetched += len(urls)
+
+            for feed, feed_urls in page_urls.items():
+                crawl = crawls[feed]
+                finished = False
+                for url in feed_urls:
+                    html = pages.get(url)
+                    items = self._parse_listing(html) if html else []
+                    crawl["page"] += 1
+                    crawl["read"] += 1
+                    crawl["items"].extend(items)
+                    listings[feed].extend(items)
+                    if not items or self._crossed(items, cutoff):
+                        finished = True
+                        break
+                if finished or crawl["page"] > max_pages:
+                    del crawls[feed]
+
+        logger.info(f"Crawled {fetched} extra listing pages back to {cutoff}")
+        return listings
+
+    def _select_articles(self, items, seen_articles, period, user_id, timezone):
+        selected = []
+        for item in items:
+            try:
+                logger.debug(f"Parsing {item['url']} - {item['title']}")
+                unique_identifier = (item["title"], item["url"])
+                if unique_identifier in seen_articles:
+                    continue
+                if not is_within_period(item["date"], period, user_id, timezone):
+                    continue
+                seen_articles.add(unique_identifier)
+                selected.append(item)
+            except Exception as e:
+                logger.error(f"Error processing article: {e}")
+        return selected
+
+    def collect_news(self, period, user_id):
+        """Articles of the requested period and the user's timezone.
+
+        Runs on the IO pool: listings are crawled and missing article bodies
+        downloaded; the items are left for classify_articles on the compute
+        worker.
+        """
+        logger.info(f"Parsing {len(self.sources)} feeds for period {period}")
+        timezone = self._get_timezone(user_id)
+        cutoff = period_cutoff(period, user_id, timezone)
+        if cutoff is None:
+            listings = self.fetch_listings(self.sources)
+        else:
+            listings = self.crawl_listings(self.sources, cutoff)
+
+        seen_articles = set()
+        selected = []
+        for link, items in listings.items():
+            selected += self._select_articles(
+                items, seen_articles, period, user_id, timezone
+            )
 
-def run_check_new_articles(user_id):
-    parser = NewsParser()
-    asyncio.run(parser.check_new_articles(user_id))
+        pending = self.load_known(selected)
+        if pending:
+            self.fetch_texts(pending)
+        self.tag_mentions(selected)
+        return selected, timezone
@@ -1,10 +1,11 @@
 import datetime
 import matplotlib.pyplot as plt
-import yfinance as yf
 import os
 
+from market.history_store import history_store
+
 def create_plt_price(stock_index, user_id):
-    data = yf.download(stock_index, period="5d", interval="1h")
+    data = history_store.get_history(stock_index, period="5d", interval="1h")
 
     if data.empty:
         return
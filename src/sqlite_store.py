@@ -0,0 +1,35 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+
+class SQLiteStore:
+    """Base of the local SQLite caches and stores.
+
+    Subclasses list their CREATE statements in `schema`; every operation
+    opens its own connection, so stores can be used from any thread. `_lock`
+    guards the in-memory counters and state of the subclass.
+    """
+
+    schema = ()
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connect() as conn:
+            self._create(conn)
+
+    def _create(self, conn):
+        for statement in self.schema:
+            conn.execute(statement)
+
+    @contextmanager
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=10)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()